@@ -0,0 +1,108 @@
+#!/usr/bin/env python3.13
+
+# simulate a peak-hour rush through the kitchen dispatch queue, then time its heap operations at depth.
+#
+# orders arrive as a Poisson process at --rate per minute and are queued as if just paid; each of
+# --stations starts the most urgent waiting order whenever free and takes about --prep minutes over it.
+# a full queue turns payments away (backpressure). the simulated clock runs as fast as the queue
+# allows, so the wall time measures the queue itself.
+#
+# usage: python benchmarks/kitchen_simulation.py [--rate 6] [--stations 75] [--hours 3] [--capacity 64]
+
+import argparse
+import heapq
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import KitchenFull, KitchenQueue, Order, ServiceType
+
+def simulate(rate: float, stations: int, hours: float, capacity: int, prep: float, seed: int = 0) -> int:
+    """Run the rush and print what customers and the queue saw; return a process exit code."""
+    rng = random.Random(seed)
+    kitchen = KitchenQueue(capacity)
+    end = hours * 3600
+    started = time.perf_counter()
+
+    # events are (time, kind, order uuid or None); a station finishing frees it to start the next order
+    events = [(rng.expovariate(rate / 60), "arrive", None)]
+    free_stations = stations
+    operations = accepted = rejected = late = 0
+    waits = []
+
+    def start_next(now: float):
+        nonlocal free_stations, operations, late
+        while free_stations:
+            ticket = kitchen.start(now=now)
+            operations += 1
+            if ticket is None:
+                return
+            free_stations -= 1
+            finish = now + rng.uniform(0.5, 1.5) * prep * 60
+            waits.append(now - ticket.paid_at)
+            late += finish > ticket.ready_by
+            heapq.heappush(events, (finish, "done", ticket.order_uuid))
+
+    while events:
+        now, kind, order_uuid = heapq.heappop(events)
+        if kind == "arrive":
+            if now < end:
+                heapq.heappush(events, (now + rng.expovariate(rate / 60), "arrive", None))
+                order = Order([], rng.choice((ServiceType.PICKUP, ServiceType.DELIVERY)))
+                try:
+                    kitchen.offer(order, paid_at=now)
+                    accepted += 1
+                except KitchenFull:
+                    rejected += 1
+                operations += 1
+        else:
+            kitchen.complete(order_uuid)
+            operations += 1
+            free_stations += 1
+        start_next(now)
+
+    elapsed = time.perf_counter() - started
+    print(f"{hours:g}h at {rate:g} orders/min, {stations} stations, ~{prep:g} min each, capacity {capacity}")
+    print(f"\taccepted {accepted}, turned away {rejected} ({rejected / max(1, accepted + rejected):.1%})")
+    if waits:
+        quantiles = statistics.quantiles(waits, n=20)
+        print(f"\twait to start: median {statistics.median(waits) / 60:.1f} min, p95 {quantiles[-1] / 60:.1f} min; ready late: {late / len(waits):.1%}")
+    print(f"\t{operations:,} queue operations in {elapsed:.2f}s ({operations / elapsed:,.0f} ops/s)")
+    return 0
+
+def time_depths(depths: list[int], operations: int = 20_000):
+    """Time offer and start with the queue held at each depth, to show the cost grows with log n."""
+    rng = random.Random(1)
+    for depth in depths:
+        kitchen = KitchenQueue(capacity=depth + operations)
+        orders = [Order([], rng.choice((ServiceType.PICKUP, ServiceType.DELIVERY))) for _ in range(depth + operations)]
+        for order in orders[:depth]:
+            kitchen.offer(order, paid_at=rng.uniform(0, 3600))
+
+        started = time.perf_counter()
+        for order in orders[depth:]:
+            kitchen.offer(order, paid_at=rng.uniform(0, 3600))
+            kitchen.start()
+        elapsed = time.perf_counter() - started
+        print(f"\tdepth {depth:>9,}: {elapsed / operations * 1e6:.2f}us per offer + start")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="simulate peak-hour load on the kitchen queue")
+    parser.add_argument("--rate", type=float, default=6, help="orders arriving per minute")
+    parser.add_argument("--stations", type=int, default=75, help="orders that can be prepared at once")
+    parser.add_argument("--hours", type=float, default=3)
+    parser.add_argument("--capacity", type=int, default=64)
+    parser.add_argument("--prep", type=float, default=12, help="average minutes to prepare an order")
+    args = parser.parse_args()
+
+    code = simulate(args.rate, args.stations, args.hours, args.capacity, args.prep)
+    print("queue depth:")
+    time_depths([100, 10_000, 200_000])
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3.13
+
+# time the OrderManager and CommandParser hot paths at a range of store sizes, without input().
+#
+# each benchmark reports the best time per operation over --repeat runs. results can be saved
+# as JSON and compared against an earlier run; the exit code is 1 if any benchmark got slower
+# than the baseline by more than --threshold.
+#
+# usage: python benchmarks/microbench.py [--scales 10,1000,100000] [--save FILE] [--compare FILE]
+#        python benchmarks/microbench.py --scales 10,1000,100000,1000000 --compare baseline.json
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import Application, OrderManager, ScriptSession, ServiceType, current_session, menu
+
+def timed(function: Callable[[], object]) -> float:
+    """Return how long one call of `function` took, in seconds."""
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+def run_once(scale: int, sample: int, seed: int) -> dict[str, tuple[int, float]]:
+    """Build a store of `scale` orders and time each operation; return {benchmark: (operations, seconds)}."""
+    rng = random.Random(seed)
+    manager = OrderManager()
+    results: dict[str, tuple[int, float]] = {}
+
+    def create():
+        for _ in range(scale):
+            manager._create_order([], rng.choice(list(ServiceType)), rng.random() < 0.2)
+    results["create"] = scale, timed(create)
+
+    orders = list(manager.orders)
+    picks = [rng.choice(orders) for _ in range(sample)]
+    items = [rng.choice(menu) for _ in range(sample)]
+
+    def add():
+        for order, item in zip(picks, items):
+            manager.current_order_uuid = order.uuid
+            manager._add_order_item(item, 2)
+    results["item add"] = sample, timed(add)
+
+    def remove():
+        for order, item in zip(picks, items):
+            manager.current_order_uuid = order.uuid
+            manager._remove_order_item(item, 1)
+    results["item remove"] = sample, timed(remove)
+
+    uuids = [order.uuid for order in picks]
+    results["lookup"] = sample, timed(lambda: [manager._get_order_by_uuid(order_uuid) for order_uuid in uuids])
+    results["total cost"] = sample, timed(lambda: [order.total_cost for order in picks])
+    results["list"] = scale, timed(manager.list_orders)
+
+    # binary searches on the time-ordered uuids: orders created in a millisecond around each pick, and the newest ten
+    windows = [(order.created_at, order.created_at + 0.001) for order in picks]
+    results["time range"] = sample, timed(lambda: [manager.orders.created_between(start, end) for start, end in windows])
+    results["latest"] = sample, timed(lambda: [manager.orders.page(max(1, len(manager.orders) - 9), 10) for _ in range(sample)])
+
+    # pay a sample of distinct orders (so at most all of them), answering yes to every prompt
+    unpaid = rng.sample(orders, min(sample, scale))
+
+    def process():
+        for order in unpaid:
+            manager.current_order_uuid = order.uuid
+            manager.process_order()
+    results["process"] = len(unpaid), timed(process)
+
+    results["summary"] = sample, timed(lambda: [manager.daily_sales.summary() for _ in range(sample)])
+    results["summary command"] = 1, timed(manager.generate_daily_sales_summary)
+
+    # command dispatch: matching, argument binding and execution of a cheap mix of commands
+    application = Application(order_manager=manager)
+    # a fresh order, since adding to a paid one would prompt to switch and list the whole store
+    manager.current_order_uuid = manager._create_order([], ServiceType.PICKUP, False).uuid
+    lines = [
+        "order item add pepperoni 1",
+        "order item add nosuchpizza",
+        "menu find pep",
+        "order summary 30m",
+        "not a command",
+    ]
+    commands = [lines[index % len(lines)] for index in range(sample)]
+    results["dispatch"] = sample, timed(lambda: [application.parser.parse_and_execute(line) for line in commands])
+
+    return results
+
+def run(scales: list[int], sample: int, repeat: int) -> dict[str, dict]:
+    """Run every benchmark at every scale, keeping the best of `repeat` runs."""
+    results: dict[str, dict] = {}
+    token = current_session.set(ScriptSession(default_answer="y"))
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            for scale in scales:
+                for attempt in range(repeat):
+                    for name, (operations, seconds) in run_once(scale, sample, seed=attempt).items():
+                        key = f"{name}@{scale}"
+                        per_op = seconds / operations
+                        if key not in results or per_op < results[key]["seconds_per_op"]:
+                            results[key] = {"benchmark": name, "scale": scale, "operations": operations, "seconds_per_op": per_op}
+    finally:
+        current_session.reset(token)
+    return results
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Return a description of every benchmark more than `threshold` slower than the baseline."""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        ratio = result["seconds_per_op"] / before["seconds_per_op"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{key}: {format_time(before['seconds_per_op'])} -> {format_time(result['seconds_per_op'])} ({ratio:.2f}x)")
+    return regressions
+
+def format_time(seconds: float) -> str:
+    """Format a per-operation time with a sensible unit."""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="microbenchmark OrderManager and CommandParser hot paths")
+    parser.add_argument("--scales", default="10,1000,100000", help="comma-separated store sizes, up to 1000000")
+    parser.add_argument("--sample", type=int, default=10_000, help="operations timed per benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scale; the best is kept")
+    parser.add_argument("--save", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare against results saved earlier")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    results = run(scales, args.sample, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+
+    for key, result in results.items():
+        line = f"{result['benchmark']:>16} {result['scale']:>9,} orders  {format_time(result['seconds_per_op']):>9}/op"
+        if baseline and key in baseline:
+            line += f"  ({result['seconds_per_op'] / baseline[key]['seconds_per_op']:.2f}x baseline)"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "timestamp": time.time(),
+                "results": results,
+            }, file, indent=2)
+
+    if baseline is None:
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print("no regressions" if not regressions else f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
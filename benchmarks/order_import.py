@@ -0,0 +1,87 @@
+#!/usr/bin/env python3.13
+
+# time bulk order imports from CSV and JSONL, check they're idempotent, and show memory stays flat.
+#
+# writes --orders synthetic orders (about 1% of them invalid) in each format to a temporary
+# directory and imports each into a fresh OrderManager, twice: the second run must add nothing.
+# "working memory" is the traced peak during an import beyond what the imported orders keep, at a
+# tenth of --orders and at the full count; it should stay about the same whatever the file size.
+#
+# usage: python benchmarks/order_import.py [--orders N]
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import OrderImport, OrderManager, gc_paused, menu
+
+def write_orders(directory: str, count: int) -> dict[str, str]:
+    """Write `count` orders as CSV and as JSONL, returning {format: path}."""
+    rng = random.Random(0)
+    names = [item.name for item in menu]
+    paths = {"csv": os.path.join(directory, f"orders-{count}.csv"), "jsonl": os.path.join(directory, f"orders-{count}.jsonl")}
+    with open(paths["csv"], "w", encoding="utf-8") as csv_file, open(paths["jsonl"], "w", encoding="utf-8") as jsonl_file:
+        csv_file.write("id,service,loyalty,item,quantity\n")
+        for index in range(count):
+            lines = [(name, rng.randint(1, 3)) for name in rng.sample(names, rng.randint(1, 4))]
+            if rng.random() < 0.01:
+                lines[0] = ("Pineapple Surprise", 1)
+            service, loyalty = rng.choice(("pickup", "delivery")), rng.random() < 0.2
+            for name, quantity in lines:
+                csv_file.write(f"web-{index},{service},{int(loyalty)},{name},{quantity}\n")
+            items = [{"name": name, "quantity": quantity} for name, quantity in lines]
+            jsonl_file.write(json.dumps({"id": f"web-{index}", "service": service, "loyalty": loyalty, "items": items}) + "\n")
+    return paths
+
+def run_import(manager: OrderManager, path: str) -> OrderImport:
+    """Import `path` the way the 'order import' command does, without its report."""
+    importer = OrderImport(manager.catalog, manager.imported)
+    with gc_paused(), open(path, encoding="utf-8", newline="") as file:
+        for batch in importer.batches(file):
+            manager._import_batch(importer, batch)
+    return importer
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="benchmark bulk order import")
+    parser.add_argument("--orders", type=int, default=100_000)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        sizes = {count: write_orders(directory, count) for count in (args.orders // 10, args.orders)}
+        for kind, path in sizes[args.orders].items():
+            manager = OrderManager()
+            started = time.perf_counter()
+            first = run_import(manager, path)
+            elapsed = time.perf_counter() - started
+            again = run_import(manager, path)
+            print(f"{kind:>5}: {first.added:,} imported, {first.rejected:,} rejected in {elapsed:.2f}s "
+                  f"({(first.added + first.rejected) / elapsed:,.0f} orders/s, {os.path.getsize(path) / 1e6:.1f}MB); "
+                  f"again: {again.added} imported, {again.skipped:,} skipped")
+            if again.added or again.skipped != first.added:
+                failures.append(f"{kind} re-import added {again.added} order(s)")
+            if len(manager.orders) != first.added:
+                failures.append(f"{kind} store holds {len(manager.orders)} order(s), not {first.added}")
+
+            for count, paths in sizes.items():
+                manager = OrderManager()
+                tracemalloc.start()
+                run_import(manager, paths[kind])
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{'':>7}{count:>9,} orders: working memory {(peak - current) / 1e6:.2f}MB")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("imports are idempotent" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3.13
+
+# measure what archiving paid orders to the cold tier saves over a long-running session.
+#
+# builds a store of --orders orders, nearly all paid as in a day's trading, once with every order
+# held in full and once with --hot-orders; reports the memory the orders take (traced allocations),
+# and the cost of iterating, looking up and scanning orders, then checks both stores list the same orders.
+#
+# usage: python benchmarks/order_tiering.py [--orders N] [--hot-orders N]
+
+import argparse
+import contextlib
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import OrderManager, ServiceType, menu
+
+def build(order_count: int, hot_limit: int | None) -> tuple[OrderManager, int]:
+    """Return a manager of `order_count` orders, 95% paid, and the bytes its orders allocated."""
+    rng = random.Random(0)
+    manager = OrderManager()
+    manager.orders.hot_limit = hot_limit
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for _ in range(order_count):
+            order = manager._create_order(rng.sample(menu, rng.randint(1, 4)), rng.choice(list(ServiceType)), rng.random() < 0.2)
+            if rng.random() < 0.95:
+                manager._pay_order(order)
+        # the kitchen and sales ledger are the same either way, so leave them out of the comparison
+        manager.kitchen = None
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return manager, used
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="benchmark hot/cold order tiering")
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--hot-orders", type=int, default=10_000)
+    args = parser.parse_args()
+
+    listings = []
+    for label, limit in (("all hot", None), (f"{args.hot_orders:,} hot", args.hot_orders)):
+        manager, used = build(args.orders, limit)
+        uuids = [order.uuid for order in manager.orders]
+        picks = random.Random(1).sample(uuids, min(10_000, len(uuids)))
+
+        started = time.perf_counter()
+        listing = [(order.paid, order.total_cents) for order in manager.orders]
+        listed = time.perf_counter() - started
+        started = time.perf_counter()
+        for order_uuid in picks:
+            manager._get_order_by_uuid(order_uuid)
+        looked_up = time.perf_counter() - started
+        started = time.perf_counter()
+        open_orders = sum(1 for _ in manager.orders.unpaid())
+        scanned = time.perf_counter() - started
+
+        print(f"{label:>12}: {manager.orders.hot_count:>7,} of {len(manager.orders):,} orders in full, "
+              f"{used / 1e6:6.1f}MB ({used / len(manager.orders):.0f}B/order)")
+        print(f"{'':>12}  iterate all {listed * 1000:.0f}ms, lookup {looked_up / len(picks) * 1e6:.2f}us, "
+              f"open-order scan {scanned * 1000:.1f}ms ({open_orders:,} open)")
+        listings.append(listing)
+
+    if listings[0] != listings[1]:
+        print("FAIL the tiered store lists different orders")
+        return 1
+    print("both stores list the same orders")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
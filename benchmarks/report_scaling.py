@@ -0,0 +1,63 @@
+#!/usr/bin/env python3.13
+
+# measure how offline sales reporting scales with worker processes.
+#
+# writes --files synthetic sales exports of --rows sales each to a temporary directory, then
+# times run_report over all of them with 1, 2, 4, ... workers up to the core count.
+#
+# usage: python benchmarks/report_scaling.py [--files N] [--rows N]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import SALES_EXPORT_HEADER, ServiceType, run_report
+
+def write_exports(directory: str, files: int, rows: int) -> list[str]:
+    """Write `files` exports, each a day of `rows` sales, returning their paths."""
+    rng = random.Random(0)
+    day = 24 * 60 * 60
+    start = time.time() - files * day
+    paths = []
+    for index in range(files):
+        path = os.path.join(directory, f"store-{index % 24:02d}-day-{index // 24:03d}.tsv")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(SALES_EXPORT_HEADER)
+            opening = start + index * day
+            for _ in range(rows):
+                file.write(f"{uuid.uuid4()}\t{opening + rng.uniform(0, day)!r}\t{rng.randint(1_000, 20_000)}\t"
+                           f"{rng.choice(list(ServiceType)).name}\t{int(rng.random() < 0.3)}\t{int(rng.random() < 0.2)}\n")
+        paths.append(path)
+    return paths
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="benchmark multi-process sales reporting")
+    parser.add_argument("--files", type=int, default=96)
+    parser.add_argument("--rows", type=int, default=5_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_exports(directory, args.files, args.rows)
+        sales = args.files * args.rows
+
+        workers = 1
+        baseline = None
+        while True:
+            started = time.perf_counter()
+            run_report(paths, workers, output="quiet")
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f"{workers:>3} worker(s): {elapsed:6.2f}s  {sales / elapsed:>12,.0f} sales/s  {baseline / elapsed:5.2f}x")
+            if workers >= (os.cpu_count() or 1):
+                break
+            workers = min(workers * 2, os.cpu_count() or 1)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3.13
+
+# measure how order throughput scales with the number of shards behind a --serve --shards router.
+#
+# for each shard count, starts `main.py --serve --shards N` and runs --clients client processes
+# against it, each creating, filling and paying orders over its own connection for --seconds.
+# reports commands per second and the speed-up over one shard. shards are separate processes, so
+# throughput can only scale up to the number of cores (the router itself takes one).
+#
+# usage: python benchmarks/shard_scaling.py [--shards 1,2,4] [--clients 8] [--seconds 5]
+
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main.py")
+
+def free_port() -> int:
+    """Return a TCP port nothing is listening on."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def client(port: int, seconds: float, results) -> None:
+    """Create, fill and pay orders until time runs out; report how many commands were answered."""
+    connection = socket.create_connection(("127.0.0.1", port))
+    stream = connection.makefile("rw", encoding="utf-8", newline="\n")
+    stream.readline()  # = ready
+
+    def send(command: str) -> None:
+        stream.write(command + "\n")
+        stream.flush()
+        while not (line := stream.readline()).startswith("= "):
+            if not line:
+                raise ConnectionError("router hung up")
+            if line.startswith("? "):
+                stream.write(("n" if "loyalty" in line else "y") + "\n")
+                stream.flush()
+
+    commands = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for command in ("order create pickup", "order item add pepperoni 2", "order item add margherita 1", "order process"):
+            send(command)
+            commands += 1
+    connection.close()
+    results.put(commands)
+
+def run(shards: int, clients: int, seconds: float) -> float:
+    """Return the commands per second `clients` sustain against `shards` shards."""
+    port = free_port()
+    router = subprocess.Popen(
+        [sys.executable, MAIN, "--serve", f"127.0.0.1:{port}", "--shards", str(shards)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        router.stdout.readline()  # serving papa-pizza on ... across N shard(s)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=client, args=(port, seconds, results)) for _ in range(clients)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        total = sum(results.get() for _ in workers)
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        return total / elapsed
+    finally:
+        router.terminate()
+        router.wait()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="benchmark throughput across order shards")
+    parser.add_argument("--shards", default=",".join(str(count) for count in (1, 2, 4, 8) if count < max(2, os.cpu_count() or 1)),
+                        help="comma-separated shard counts")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} core(s), {args.clients} clients, {args.seconds:g}s per run")
+    baseline = None
+    for shards in map(int, args.shards.split(",")):
+        throughput = run(shards, args.clients, args.seconds)
+        baseline = baseline or throughput
+        print(f"{shards:>3} shard(s): {throughput:>9,.0f} commands/s ({throughput / baseline:.2f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
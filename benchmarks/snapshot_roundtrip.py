@@ -0,0 +1,83 @@
+#!/usr/bin/env python3.13
+
+# time saving and restoring a binary snapshot of a large OrderManager, and check the restore is faithful
+# (orders, sales, current order and kitchen queue).
+#
+# usage: python benchmarks/snapshot_roundtrip.py [--orders N]
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import OrderManager, ServiceType, Snapshot, menu
+
+def build(order_count: int) -> OrderManager:
+    """Return a manager with `order_count` orders of a few items each, about a third of them paid."""
+    rng = random.Random(0)
+    manager = OrderManager()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for _ in range(order_count):
+            order = manager._create_order(rng.sample(menu, rng.randint(1, 4)), rng.choice(list(ServiceType)), rng.random() < 0.2)
+            if rng.random() < 0.35:
+                manager._pay_order(order)
+                # the kitchen has started some of the paid orders
+                if rng.random() < 0.5:
+                    manager.kitchen.start()
+    manager.current_order_uuid = order.uuid
+    return manager
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="benchmark snapshot save and restore")
+    parser.add_argument("--orders", type=int, default=100_000)
+    args = parser.parse_args()
+
+    manager = build(args.orders)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.snapshot")
+
+        started = time.perf_counter()
+        Snapshot.save(manager, path)
+        saved = time.perf_counter() - started
+
+        restored = OrderManager()
+        started = time.perf_counter()
+        Snapshot.load(restored, path)
+        loaded = time.perf_counter() - started
+
+        started = time.perf_counter()
+        orders = list(restored.orders)
+        materialized = time.perf_counter() - started
+
+        print(f"{args.orders:,} orders, {len(manager.daily_sales):,} sales, {os.path.getsize(path) / 1e6:.1f}MB")
+        print(f"save {saved * 1000:.0f}ms, load {loaded * 1000:.0f}ms, then building every order {materialized * 1000:.0f}ms")
+
+        failures = []
+        for before, after in zip(manager.orders, orders):
+            if (before.uuid, before.paid, before.total_cents, {item.name: line.quantity for item, line in before.items.items()}) != \
+               (after.uuid, after.paid, after.total_cents, {item.name: line.quantity for item, line in after.items.items()}):
+                failures.append(f"order {before.uuid} differs after restore")
+        if len(orders) != len(manager.orders):
+            failures.append(f"{len(orders)} orders restored of {len(manager.orders)}")
+        if list(restored.daily_sales.items()) != list(manager.daily_sales.items()) or restored.daily_sales.total != manager.daily_sales.total:
+            failures.append("sales differ after restore")
+        if restored.current_order_uuid != manager.current_order_uuid:
+            failures.append("current order differs after restore")
+        for state in ("in_progress", "waiting"):
+            tickets = [[(ticket.order_uuid, ticket.paid_at, ticket.ready_by, ticket.started_at) for ticket in getattr(kitchen, state)()]
+                       for kitchen in (manager.kitchen, restored.kitchen)]
+            if tickets[0] != tickets[1]:
+                failures.append(f"kitchen tickets {state.replace('_', ' ')} differ after restore")
+
+    for failure in failures[:10]:
+        print(f"FAIL {failure}")
+    print("restore matches" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3.13
+
+# time cold starts of a one-shot scripted invocation, the way POS hooks and shell scripts launch it.
+#
+# each case is started --runs times in a fresh interpreter with output piped (so uncoloured);
+# the minimum and median wall times are reported against a bare interpreter start. `python -m main`
+# runs from cached bytecode, where `python main.py` recompiles the whole file on every start.
+#
+# usage: python benchmarks/startup.py [--runs N] [--command "order summary"]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def time_runs(arguments: list[str], stdin: bytes, runs: int) -> list[float]:
+    """Start `arguments` `runs` times, returning each wall time in seconds."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(arguments, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT, check=False)
+        times.append(time.perf_counter() - started)
+    return times
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="measure papa-pizza start-up time")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--command", default="order summary", help="command the scripted runs execute")
+    parser.add_argument("--python", default=sys.executable, help="interpreter to launch")
+    args = parser.parse_args()
+
+    # byte-compile up front so the module case measures a warm cache, even under PYTHONDONTWRITEBYTECODE
+    subprocess.run([args.python, "-m", "compileall", "-q", "main.py"], cwd=ROOT, check=True)
+
+    stdin = f"{args.command}\n".encode()
+    cases = {
+        "interpreter only": [args.python, "-c", "pass"],
+        "python main.py": [args.python, "main.py", "-s", "-"],
+        "python -m main": [args.python, "-m", "main", "-s", "-"],
+    }
+
+    print(f"{args.runs} runs each of '{args.command}'")
+    for name, arguments in cases.items():
+        times = time_runs(arguments, stdin, args.runs)
+        print(f"{name:>18}: min {min(times) * 1000:6.1f}ms  median {statistics.median(times) * 1000:6.1f}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
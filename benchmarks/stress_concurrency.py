@@ -0,0 +1,98 @@
+#!/usr/bin/env python3.13
+
+# hammer one shared OrderManager from a pool of threads and check nothing gets lost:
+# every unit added or removed is accounted for, and every order is paid exactly once.
+#
+# usage: python benchmarks/stress_concurrency.py [--threads N] [--orders N] [--rounds N]
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import OrderManager, ScriptSession, ServiceType, current_session, format_cents, menu
+
+def worker(manager: OrderManager, orders: list, rounds: int, seed: int) -> dict:
+    """Add and remove items at random, then race to pay every order; return the net units this thread changed."""
+    view = manager.session_view()
+    token = current_session.set(ScriptSession(default_answer="y"))
+    rng = random.Random(seed)
+    net: dict[tuple, int] = {}
+
+    try:
+        for _ in range(rounds):
+            order = rng.choice(orders)
+            item = rng.choice(menu)
+            quantity = rng.randint(1, 3)
+            view.current_order_uuid = order.uuid
+
+            if rng.random() < 0.7:
+                change = quantity if view._add_order_item(item, quantity) else 0
+            else:
+                change = -view._remove_order_item(item, quantity)
+            net[order.uuid, item] = net.get((order.uuid, item), 0) + change
+
+        # every thread tries to pay every order; exactly one attempt per order may win
+        for order in orders:
+            view.current_order_uuid = order.uuid
+            view.process_order()
+    finally:
+        current_session.reset(token)
+
+    return net
+
+def stress(threads: int, order_count: int, rounds: int) -> int:
+    """Run the stress test and report; return a process exit code."""
+    # force frequent thread switches so races actually get a chance to happen
+    sys.setswitchinterval(1e-6)
+
+    manager = OrderManager()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        orders = [manager._create_order([], random.choice(list(ServiceType)), False) for _ in range(order_count)]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(lambda seed: worker(manager, orders, rounds, seed), range(threads)))
+        elapsed = time.perf_counter() - started
+
+    expected: dict[tuple, int] = {}
+    for net in results:
+        for key, change in net.items():
+            expected[key] = expected.get(key, 0) + change
+
+    failures = []
+    for order in orders:
+        for item in menu:
+            want = expected.get((order.uuid, item), 0)
+            have = order.items[item].quantity if item in order.items else 0
+            if want != have:
+                failures.append(f"order {order.uuid} {item.name}: expected {want}, found {have}")
+
+        if not order.paid:
+            failures.append(f"order {order.uuid} was never paid")
+        elif manager.daily_sales[order.uuid] != order.total_cents:
+            failures.append(f"order {order.uuid} recorded {format_cents(manager.daily_sales[order.uuid])}, costs {format_cents(order.total_cents)}")
+
+    if len(manager.daily_sales) != len(orders):
+        failures.append(f"{len(manager.daily_sales)} sales recorded for {len(orders)} orders")
+
+    operations = threads * (rounds + order_count)
+    print(f"{threads} threads, {order_count} orders, {operations} operations in {elapsed:.2f}s ({operations / elapsed:,.0f} ops/s)")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("no lost updates" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="stress a shared OrderManager from many threads")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    sys.exit(stress(args.threads, args.orders, args.rounds))
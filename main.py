@@ -10,21 +10,117 @@
 # | .__/|_/___/___\__,_| 🍕 
 # |_|              by esi ✦         
 
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import gc
+import io
+import heapq
+import mmap
+import os
 import signal
+import struct
 import sys
+import threading
+import time
 
-from typing import Callable
+from typing import Callable, Iterable, Iterator, TextIO
+from collections import Counter, deque
+from contextvars import ContextVar
 from abc import ABC, abstractmethod
+from array import array
+import bisect
 from enum import Enum
-import inspect
+import itertools
 
-import uuid
+class LazyModule:
+    """Stand in for a module, importing it the first time one of its attributes is used.
 
-from termcolor import cprint, colored
-from colorama import just_fix_windows_console as enable_windows_ansi_interpretation
+    The import then takes the stand-in's place in this module's globals, so only the first
+    use pays for it. Keeps start-up quick for invocations that never need the module.
+    """
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attribute: str):
+        module = __import__(self._name)
+        globals()[self._name] = module
+        return getattr(module, attribute)
+
+# only the server needs asyncio, only menu files and json output need json, and order ids
+# aren't needed until an order is created or restored
+asyncio = LazyModule("asyncio")
+json = LazyModule("json")
+csv = LazyModule("csv")
+uuid = LazyModule("uuid")
+
+# fix windows terminal misinterpreting ANSI escape sequences; nothing else needs it
+if os.name == "nt":
+    from colorama import just_fix_windows_console as enable_windows_ansi_interpretation
+    enable_windows_ansi_interpretation()
+
+def supports_color(stream: TextIO) -> bool:
+    """Return whether ANSI colour should be written to `stream`: only terminals, and never with NO_COLOR set."""
+    if "NO_COLOR" in os.environ:
+        return False
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+def ansi(text: str, color: str | None = None, attrs: list[str] | None = None) -> str:
+    """Wrap `text` in ANSI colour codes, importing termcolor only once something is actually coloured."""
+    from termcolor import colored as termcolor_colored
+    return termcolor_colored(text, color, attrs=attrs)
+
+def colored(text: str, color: str | None = None, attrs: list[str] | None = None) -> str:
+    """Return `text` coloured for stdout, or unchanged when stdout isn't a colour terminal."""
+    return ansi(text, color, attrs) if supports_color(sys.stdout) else text
+
+def cprint(text: str, color: str | None = None, attrs: list[str] | None = None, **kwargs):
+    """Print `text` coloured for stdout, or plain when stdout isn't a colour terminal."""
+    print(colored(text, color, attrs), **kwargs)
+
+class Renderer:
+    """Build output in a buffer and write it in one go, or in large chunks when streaming.
+
+    Colour is decided once for the stream, so nothing is formatted for pipes and files.
+    Use as a context manager so whatever is buffered gets written at the end.
+    """
+    def __init__(self, stream: TextIO | None = None, chunk_lines: int | None = None):
+        self.stream = stream or sys.stdout
+        self.color = supports_color(self.stream)
+        self.chunk_lines = chunk_lines
+        self._lines: list[str] = []
+
+    def __enter__(self) -> "Renderer":
+        return self
+
+    def __exit__(self, *_):
+        self.flush()
+
+    def paint(self, text: str, color: str | None = None, attrs: list[str] | None = None) -> str:
+        """Return `text` coloured if the stream supports it."""
+        if self.color and (color or attrs):
+            return ansi(text, color, attrs)
+        return text
+
+    def line(self, text: str = "", color: str | None = None, attrs: list[str] | None = None):
+        """Buffer one line of output."""
+        self._lines.append(self.paint(text, color, attrs))
+        if self.chunk_lines is not None and len(self._lines) >= self.chunk_lines:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far with a single write call."""
+        if self._lines:
+            self._lines.append("")
+            self.stream.write("\n".join(self._lines))
+            self.stream.flush()
+            self._lines.clear()
 
-# fix windows terminal misinterpreting ANSI escape sequences
-enable_windows_ansi_interpretation()
 
 # establish a base class for order items
 class OrderItem(ABC):
@@ -39,6 +135,11 @@ class OrderItem(ABC):
     def price(self) -> float:
         pass
 
+    @property
+    def category(self) -> str:
+        """Heading the item is listed under on the menu."""
+        return type(self).__name__
+
 # pizza implementation uses `OrderItem` as its base class
 class Pizza(OrderItem):
     """Concrete OrderItem representing a pizza with a name and a price."""
@@ -72,109 +173,2132 @@ menu: list[OrderItem] = [
     Pizza("Margherita", 18.50),
 ]
 
+# generic implementation for anything else a menu file lists -- sides, drinks, desserts
+class CatalogItem(OrderItem):
+    """Concrete OrderItem loaded from a menu file, with a name, price and free-form category."""
+    def __init__(self, name: str, price: float, category: str):
+        self._name = name
+        self._price = price
+        self._category = category
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def price(self) -> float:
+        return self._price
+
+    @property
+    def category(self) -> str:
+        return self._category
+
+def make_menu_item(name: str, price: float, category: str = "Pizza") -> OrderItem:
+    """Build the OrderItem for a menu entry: a Pizza for pizzas, a CatalogItem otherwise."""
+    return Pizza(name, price) if category == "Pizza" else CatalogItem(name, price, category)
+
+class MenuCatalog:
+    """The menu, indexed by case-folded name, with a prefix trie for completion and fuzzy matching.
+
+    A catalog loaded from a JSON file reloads itself when the file changes. Items whose name,
+    price and category are unchanged keep their identity across reloads, and orders keep
+    whatever items they already hold, so an order's lines never change under it.
+    """
+    # key under which a trie node stores the item whose name ends there
+    _END = ""
+
+    def __init__(self, items: Iterable[OrderItem] = (), path: str | None = None, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._mtime = None
+        self._checked_at = 0.0
+        self._index(list(items))
+        if path is not None:
+            self.reload()
+
+    def __iter__(self):
+        self._maybe_reload()
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _index(self, items: list[OrderItem]):
+        by_name = {}
+        trie = {}
+        for item in items:
+            key = item.name.casefold()
+            by_name[key] = item
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[self._END] = item
+
+        # swap the indexes in together, so concurrent lookups see the old menu or the new one
+        self._items, self._by_name, self._trie = items, by_name, trie
+
+    def reload(self) -> bool:
+        """Re-read the menu file; on error keep the current menu. Return whether it was reloaded."""
+        if self.path is None:
+            return False
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, encoding="utf-8") as file:
+                entries = json.load(file)
+            if isinstance(entries, dict):
+                entries = entries["items"]
+
+            items = []
+            for entry in entries:
+                item = make_menu_item(str(entry["name"]), float(entry["price"]), str(entry.get("category", "Pizza")))
+                # reuse the existing object when nothing about the item changed
+                current = self._by_name.get(item.name.casefold())
+                if current is not None and (current.name, current.price, current.category) == (item.name, item.price, item.category):
+                    item = current
+                items.append(item)
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            print_error(f"couldn't load menu from {self.path}: {error}")
+            return False
+
+        self._mtime = mtime
+        self._index(items)
+        return True
+
+    def _maybe_reload(self):
+        """Reload if the menu file changed, checking its mtime at most once per `check_interval`."""
+        if self.path is None:
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        try:
+            changed = os.stat(self.path).st_mtime_ns != self._mtime
+        except OSError:
+            return
+        if changed and self.reload():
+            cprint(f"menu reloaded from {self.path}", "yellow")
+
+    def get(self, name: str) -> OrderItem | None:
+        """Return the item with this name, ignoring case, or None."""
+        self._maybe_reload()
+        return self._by_name.get(name.strip().casefold())
+
+    def complete(self, prefix: str, limit: int = 10) -> list[OrderItem]:
+        """Return up to `limit` items whose names start with `prefix`, ignoring case."""
+        self._maybe_reload()
+        node = self._trie
+        for char in prefix.strip().casefold():
+            node = node.get(char)
+            if node is None:
+                return []
+
+        matches = []
+        stack = [node]
+        while stack and len(matches) < limit:
+            node = stack.pop()
+            for char, child in sorted(node.items(), reverse=True):
+                if char == self._END:
+                    matches.append(child)
+                else:
+                    stack.append(child)
+        return matches[:limit]
+
+    def suggest(self, name: str, max_distance: int = 2, limit: int = 3) -> list[OrderItem]:
+        """Return up to `limit` items within `max_distance` edits of `name`, closest first.
+
+        Walks the trie with one row of the edit-distance table per node, pruning any branch
+        whose row can no longer come within `max_distance`.
+        """
+        self._maybe_reload()
+        target = name.strip().casefold()
+        matches = []
+
+        stack = [(self._trie, list(range(len(target) + 1)))]
+        while stack:
+            node, row = stack.pop()
+            for char, child in node.items():
+                if char == self._END:
+                    if row[-1] <= max_distance:
+                        matches.append((row[-1], child.name, child))
+                    continue
+
+                next_row = [row[0] + 1]
+                for column, target_char in enumerate(target, start=1):
+                    next_row.append(min(
+                        next_row[column - 1] + 1,
+                        row[column] + 1,
+                        row[column - 1] + (target_char != char),
+                    ))
+                if min(next_row) <= max_distance:
+                    stack.append((child, next_row))
+
+        matches.sort(key=lambda match: match[:2])
+        return [item for _, _, item in matches[:limit]]
+
+def to_cents(dollars: float) -> int:
+    """Convert a dollar amount to whole cents."""
+    return round(dollars * 100)
+
+def format_cents(cents: int) -> str:
+    """Format cents as dollars, e.g. 2310 -> '$23.10', without going through floats."""
+    dollars, remainder = divmod(abs(cents), 100)
+    return f"{'-' if cents < 0 else ''}${dollars:,}.{remainder:02d}"
+
+class PricingRule:
+    """A declared pricing step: a percentage (in basis points) or flat adjustment, applied when `applies` holds.
+
+    `applies` receives the order's subtotal in cents and the order itself.
+    """
+    __slots__ = ("label", "kind", "rate_bp", "flat_cents", "applies")
+
+    def __init__(self, label: str, kind: str, rate_bp: int = 0, flat_cents: int = 0,
+                 applies: Callable[[int, "Order"], bool] | None = None):
+        self.label = label
+        self.kind = kind
+        self.rate_bp = rate_bp
+        self.flat_cents = flat_cents
+        self.applies = applies
+
+class Quote:
+    """The result of pricing an order: subtotal, total and each rule's adjustment, all in cents."""
+    __slots__ = ("subtotal_cents", "total_cents", "adjustments")
+
+    def __init__(self, subtotal_cents: int, total_cents: int, adjustments: tuple[tuple[PricingRule, int], ...]):
+        self.subtotal_cents = subtotal_cents
+        self.total_cents = total_cents
+        self.adjustments = adjustments
+
+    @property
+    def is_discounted(self) -> bool:
+        return any(rule.kind == "discount" for rule, _ in self.adjustments)
+
+class PricingEngine:
+    """Compile pricing rules once into a pipeline of steps that prices orders in integer cents.
+
+    Each rule adjusts the running amount in turn. Percentages round half away from zero to
+    the cent, so every quoted total is exact and sales reconcile to the cent.
+    """
+    def __init__(self, rules: Iterable[PricingRule]):
+        self.rules = tuple(rules)
+        self._steps = tuple(self._compile(rule) for rule in self.rules)
+
+    @staticmethod
+    def _compile(rule: PricingRule):
+        applies = rule.applies or (lambda subtotal, order: True)
+        if rule.rate_bp:
+            rate_bp = rule.rate_bp
+            sign = -1 if rate_bp < 0 else 1
+            magnitude = abs(rate_bp)
+
+            def adjust(amount: int) -> int:
+                return sign * ((amount * magnitude + 5_000) // 10_000)
+        else:
+            flat_cents = rule.flat_cents
+
+            def adjust(amount: int) -> int:
+                return flat_cents
+
+        return rule, applies, adjust
+
+    def quote(self, order: "Order", subtotal_cents: int) -> Quote:
+        """Price one order from its subtotal, keeping the itemised adjustments."""
+        amount = subtotal_cents
+        adjustments = []
+        for rule, applies, adjust in self._steps:
+            if applies(subtotal_cents, order):
+                delta = adjust(amount)
+                amount += delta
+                adjustments.append((rule, delta))
+        return Quote(subtotal_cents, amount, tuple(adjustments))
+
+    def total_batch(self, orders: list["Order"], adjustments: dict[PricingRule, int] | None = None) -> array:
+        """Price many orders, one rule at a time over a packed column of amounts, returning totals in cents.
+
+        If `adjustments` is given, each rule that applied gets its summed adjustment across the batch.
+        """
+        subtotals = array("q", [order.raw_cents for order in orders])
+        totals = array("q", subtotals)
+        for rule, applies, adjust in self._steps:
+            applied = 0
+            for index, order in enumerate(orders):
+                if applies(subtotals[index], order):
+                    delta = adjust(totals[index])
+                    totals[index] += delta
+                    applied += delta
+            if adjustments is not None and applied:
+                adjustments[rule] = applied
+        return totals
+
+# papa-pizza's pricing, declared once: every total and breakdown is produced from these
+PRICING = PricingEngine([
+    # Apply 5% discount for loyalty or bulk orders > $100
+    PricingRule("5% discount", "discount", rate_bp=-500,
+                applies=lambda subtotal, order: subtotal > 100_00 or order.has_loyalty_card),
+    # Apply delivery charge if order is for delivery
+    PricingRule("delivery", "fee", flat_cents=8_00,
+                applies=lambda subtotal, order: order.service_type is ServiceType.DELIVERY),
+    # add 10% GST
+    PricingRule("10% GST", "tax", rate_bp=1_000),
+])
+
+class OrderIds:
+    """Source of time-ordered order uuids (UUIDv7, RFC 9562), strictly increasing within this process.
+
+    A uuid is a 48-bit unix time in milliseconds, then 74 random bits around the version and
+    variant. When the clock hasn't moved on (or went back), the previous uuid's bits plus one
+    are used instead, so uuids made later always sort later.
+
+    In a shard of a sharded server, only uuids the shard owns (see `shard_of`) are handed out.
+    """
+    RANDOM_BITS = 74
+
+    def __init__(self, shard: int = 0, shards: int = 1):
+        self.shard = shard
+        self.shards = shards
+        self._lock = threading.Lock()
+        # the last uuid's timestamp and random bits, as one 122-bit number
+        self._last = 0
+
+    def next(self) -> uuid.UUID:
+        """Return a new uuid, greater than any this source returned before."""
+        value = int(time.time() * 1000) << self.RANDOM_BITS | int.from_bytes(os.urandom(10)) >> (80 - self.RANDOM_BITS)
+        with self._lock:
+            if value <= self._last:
+                value = self._last + 1
+            # step to the next uuid this shard owns; one in every `shards` is
+            while self._compose(value) % self.shards != self.shard:
+                value += 1
+            self._last = value
+        return uuid.UUID(int=self._compose(value))
+
+    @classmethod
+    def _compose(cls, value: int) -> int:
+        # version 7 above the top 12 random bits, and the rfc variant above the other 62
+        millis, high, low = value >> cls.RANDOM_BITS, (value >> 62) & 0xFFF, value & ((1 << 62) - 1)
+        return millis << 80 | 0x7 << 76 | high << 64 | 0b10 << 62 | low
+
+    @staticmethod
+    def shard_of(order_uuid: uuid.UUID, shards: int) -> int:
+        """Return which of `shards` shards owns an order: its uuid modulo the shard count."""
+        return order_uuid.int % shards
+
+    @staticmethod
+    def created_at(order_uuid: uuid.UUID) -> float | None:
+        """Return the unix time a time-ordered uuid was made at, or None for any other kind."""
+        value = order_uuid.int
+        return (value >> 80) / 1000 if (value >> 76) & 0xF == 7 else None
+
+ORDER_IDS = OrderIds()
+
+class LineItem:
+    """A menu item and how many units of it are in an order."""
+    __slots__ = ("item", "quantity")
+
+    def __init__(self, item: OrderItem, quantity: int = 0):
+        self.item = item
+        self.quantity = quantity
+
 class Order:
-    """Represents a customer order, its items, service type, discounts, and payment status."""
-    def __init__(self, items: list[OrderItem], service_type: ServiceType, has_loyalty_card: bool = False):
-        self.uuid = uuid.uuid4()
-        self.items = items
+    """Represents a customer order, its items, service type, discounts, and payment status.
+
+    Mutations happen under the order's own `lock`, and the order is re-quoted as part of
+    each mutation, so reading its totals never writes anything. Money is kept in cents.
+    """
+    __slots__ = ("uuid", "items", "service_type", "has_loyalty_card", "paid", "lock", "_raw_cents", "_quote")
+
+    def __init__(self, items: list[OrderItem], service_type: ServiceType, has_loyalty_card: bool = False, order_uuid: uuid.UUID | None = None):
+        self.uuid = order_uuid or ORDER_IDS.next()
+        # one line item per distinct menu item, so memory scales with variety rather than units
+        self.items: dict[OrderItem, LineItem] = {}
         self.service_type = service_type
         self.has_loyalty_card = has_loyalty_card
-        self.is_discounted = False
         self.paid = False
+        # reentrant, so callers can hold it across a mutation and whatever they record alongside it
+        self.lock = threading.RLock()
+        # running subtotal and the quote derived from it, both kept current on every change
+        self._raw_cents = 0
+        self._quote = PRICING.quote(self, 0)
+
+        for item in items:
+            self.add_item(item)
+
+    @property
+    def created_at(self) -> float | None:
+        """Return when the order was created, from its uuid (None for orders from before uuids were time-ordered)."""
+        return ORDER_IDS.created_at(self.uuid)
+
+    @property
+    def item_count(self) -> int:
+        """Return the total number of units across all line items."""
+        return sum(line.quantity for line in list(self.items.values()))
+
+    def add_item(self, item: OrderItem, quantity: int = 1):
+        """Add `quantity` units of an item, updating the running totals."""
+        with self.lock:
+            if self.paid:
+                raise ValueError("order already paid!")
+
+            line = self.items.get(item)
+            if line is None:
+                line = self.items[item] = LineItem(item)
+            line.quantity += quantity
+
+            self._raw_cents += to_cents(item.price) * quantity
+            self._quote = PRICING.quote(self, self._raw_cents)
+
+    def remove_item(self, item: OrderItem, quantity: int = 1) -> int:
+        """Remove up to `quantity` units of an item, returning how many were removed."""
+        with self.lock:
+            if self.paid:
+                raise ValueError("order already paid!")
+
+            line = self.items.get(item)
+            if line is None:
+                return 0
+
+            removed = min(quantity, line.quantity)
+            line.quantity -= removed
+            if line.quantity == 0:
+                del self.items[item]
+
+            self._raw_cents -= to_cents(item.price) * removed
+            self._quote = PRICING.quote(self, self._raw_cents)
+            return removed
+
+    @classmethod
+    def restore(cls, order_uuid: uuid.UUID | None, service_type: ServiceType, has_loyalty_card: bool, paid: bool,
+                lines: Iterable[tuple[OrderItem, int]]) -> Order:
+        """Rebuild a saved order as it was, paid or not, pricing it once rather than per item."""
+        order = cls.__new__(cls)
+        order.uuid = order_uuid
+        order.items = {item: LineItem(item, quantity) for item, quantity in lines}
+        order.service_type = service_type
+        order.has_loyalty_card = has_loyalty_card
+        order.paid = paid
+        order.lock = threading.RLock()
+        order._raw_cents = sum(to_cents(item.price) * line.quantity for item, line in order.items.items())
+        order._quote = PRICING.quote(order, order._raw_cents)
+        return order
+
+    def pay(self) -> int | None:
+        """Mark the order paid, returning the total charged in cents, or None if it was already paid."""
+        with self.lock:
+            if self.paid:
+                return None
+            self.paid = True
+            return self._quote.total_cents
 
     # Calculate the cost of the order based on menu prices
     @property
-    def raw_cost(self):
-        """Return sum of item prices before discounts, fees, or taxes."""
-        return sum(item.price for item in self.items)
-    
-    # Calculate total cost, apply discounts and delivery charges
+    def raw_cents(self) -> int:
+        """Return sum of item prices in cents, before discounts, fees, or taxes."""
+        return self._raw_cents
+
     @property
-    def total_cost(self):
-        """Compute total cost including discounts, delivery fee, and GST."""
-        cost = self.raw_cost
-        # Apply 5% discount for loyalty or bulk orders > $100
-        if cost > 100 or self.has_loyalty_card:
-            cost *= 0.95
-            self.is_discounted = True
-
-        if self.service_type is ServiceType.PICKUP:
-            pass
-        elif self.service_type is ServiceType.DELIVERY:
-            # Apply delivery charge if order is for delivery
-            cost += 8.00
-        else:
-            raise ValueError("Invalid service type!")
+    def raw_cost(self) -> float:
+        """Return sum of item prices in dollars, before discounts, fees, or taxes."""
+        return self._raw_cents / 100
+
+    @property
+    def quote(self) -> "Quote":
+        """Return the itemised pricing of the order as it stands."""
+        return self._quote
+
+    @property
+    def is_discounted(self) -> bool:
+        """Return whether any discount applies."""
+        return self._quote.is_discounted
+
+    @property
+    def total_cents(self) -> int:
+        """Return total cost in cents, including discounts, delivery fee, and GST."""
+        return self._quote.total_cents
+
+    @property
+    def total_cost(self) -> float:
+        """Return total cost in dollars, including discounts, delivery fee, and GST."""
+        return self._quote.total_cents / 100
+
+class OrderStore:
+    """Collection of orders sorted by uuid, with O(1) uuid lookup and O(log n) positional access.
+
+    Writers (and positional reads, which walk the tree) take the store lock. Lookups by uuid,
+    `len` and iteration are lock-free: each index is swapped out whole, never rebuilt in place.
+
+    Uuids are time-ordered, so orders are kept in the order they were created, and a time range
+    is found by binary search on their sort keys. New orders are given their uuid as they're added,
+    under the lock, so they always go at the end; only replayed ones can land in the middle. Orders from before uuids were time-ordered all
+    share the lowest key and keep the order they were added in, ahead of the rest.
+
+    Orders restored from a snapshot start out as their record number in it, and are only
+    built (under the lock, once) when first looked up, iterated over or removed. Whether each
+    record is paid is kept alongside, so scans for unpaid orders build only those.
+
+    Once more than `hot_limit` orders are held as Order objects, the longest-paid are archived
+    to a cold tier of packed records, keeping their place. Looking one up, or iterating over it,
+    builds a fresh copy from its record each time; paid orders can't change, so nothing is lost.
+    """
+    # an archived order: uuid, service type and loyalty card, followed by its lines
+    COLD = struct.Struct("<16sBB")
+    # interned item, quantity
+    COLD_LINE = struct.Struct("<II")
+
+    def __init__(self, hot_limit: int | None = None):
+        self._lock = threading.RLock()
+        self._by_uuid: dict[uuid.UUID, Order | int | bytes] = {}
+        self._slot_by_uuid: dict[uuid.UUID, int] = {}
+        # append-only slots; removed orders leave a `None` tombstone until the next compaction
+        self._slots: list[Order | int | bytes | None] = []
+        # fenwick (binary indexed) tree counting live slots, 1-based -- index 0 is unused
+        self._tree: list[int] = [0]
+        # sort key of each slot (tombstones included), ascending
+        self._keys: list[int] = []
+        # uuid and paid flag of each snapshot record, and the mapped snapshot the rest is read from
+        self._record_uuids: list[uuid.UUID] = []
+        self._record_paid = b""
+        self.snapshot: SnapshotRecords | None = None
+        # entries not held as Order objects: archived records and snapshot records not yet built
+        self._cold_count = 0
+        # hot paid orders in the order they were paid, oldest (the first to archive) first
+        self._archivable: deque[uuid.UUID] = deque()
+        # items referenced by archived records, each stored once
+        self._cold_items: list[OrderItem] = []
+        self._cold_item_index: dict[OrderItem, int] = {}
+        self._hot_limit = None
+        self.hot_limit = hot_limit
+
+    @property
+    def hot_limit(self) -> int | None:
+        """Most orders to hold as Order objects before archiving paid ones, or None for no limit."""
+        return self._hot_limit
+
+    @hot_limit.setter
+    def hot_limit(self, limit: int | None):
+        with self._lock:
+            if self._hot_limit is None and limit is not None:
+                # paid orders aren't tracked without a limit, so find the ones already held
+                self._archivable = deque(
+                    order_uuid for order_uuid, order in self._by_uuid.items() if order.__class__ is Order and order.paid
+                )
+            self._hot_limit = limit
+            self._archive_excess()
+
+    @property
+    def hot_count(self) -> int:
+        """Number of orders held as Order objects."""
+        return len(self._by_uuid) - self._cold_count
+
+    def __len__(self) -> int:
+        return len(self._by_uuid)
+
+    def __bool__(self) -> bool:
+        return bool(self._by_uuid)
+
+    def __contains__(self, order_uuid) -> bool:
+        return order_uuid in self._by_uuid
+
+    def __iter__(self):
+        return (
+            order if order.__class__ is Order else self._resolve(order)
+            for order in self._slots if order is not None
+        )
+
+    def unpaid(self):
+        """Iterate over the unpaid orders, building only those snapshot records (archived orders are all paid)."""
+        paid = self._record_paid
+        for order in self._slots:
+            if order.__class__ is Order:
+                if not order.paid:
+                    yield order
+            elif order.__class__ is int and not paid[order]:
+                yield self._materialize(order)
+
+    def unpaid_counts(self) -> tuple[int, int]:
+        """Return the number of unpaid orders and the units across them, without building any."""
+        paid = self._record_paid
+        orders = units = 0
+        for order in self._slots:
+            if order.__class__ is Order:
+                if not order.paid:
+                    orders += 1
+                    units += order.item_count
+            elif order.__class__ is int and not paid[order]:
+                orders += 1
+                units += self.snapshot.units(order)
+        return orders, units
+
+    def entries(self) -> list[tuple[uuid.UUID, Order | int | bytes]]:
+        """Return (uuid, entry) for every order, in order, without building any.
+
+        An entry is the Order itself, the number of a record in `snapshot` not yet built, or an
+        archived record, which `cold_fields` reads.
+        """
+        with self._lock:
+            record_uuids = self._record_uuids
+            return [
+                (entry.uuid if entry.__class__ is Order else record_uuids[entry] if entry.__class__ is int
+                 else uuid.UUID(bytes=entry[:16]), entry)
+                for entry in self._slots if entry is not None
+            ]
+
+    def cold_fields(self, record: bytes) -> tuple[ServiceType, bool, list[tuple[OrderItem, int]]]:
+        """Return an archived record's service type, loyalty card and (item, quantity) lines."""
+        _, service_type, loyalty = self.COLD.unpack_from(record)
+        items = self._cold_items
+        return (ServiceType(service_type), bool(loyalty),
+                [(items[item], quantity) for item, quantity in self.COLD_LINE.iter_unpack(memoryview(record)[self.COLD.size:])])
+
+    def get(self, order_uuid: uuid.UUID | None) -> Order | None:
+        """Return the order with the given uuid, or None."""
+        order = self._by_uuid.get(order_uuid)
+        return order if order is None or order.__class__ is Order else self._resolve(order)
+
+    def load(self, order_uuids: list[uuid.UUID], paid: bytes, snapshot: SnapshotRecords):
+        """Replace the contents with the records of a snapshot, each built on first access; `paid` holds a flag per record."""
+        count = len(order_uuids)
+        with self._lock:
+            self._record_uuids = order_uuids
+            self._record_paid = paid
+            self.snapshot = snapshot
+            self._by_uuid = dict(zip(order_uuids, range(count)))
+            self._slot_by_uuid = dict(zip(order_uuids, range(1, count + 1)))
+            self._slots = list(range(count))
+            # a snapshot lists orders as they were stored, so already sorted
+            self._keys = [self._key(order_uuid) for order_uuid in order_uuids]
+            # with every slot live, each fenwick node simply counts the slots it covers
+            self._tree = [0] + [slot & -slot for slot in range(1, count + 1)]
+            self._cold_count = count
+            self._archivable = deque()
+
+    def settled(self, order: Order):
+        """Note that an order has been paid, archiving the longest-paid orders if too many are hot."""
+        if self._hot_limit is None:
+            return
+        with self._lock:
+            self._archivable.append(order.uuid)
+            self._archive_excess()
+
+    def _resolve(self, entry: int | bytes) -> Order:
+        return self._materialize(entry) if entry.__class__ is int else self._thaw(entry)
+
+    def _materialize(self, record: int) -> Order:
+        with self._lock:
+            order_uuid = self._record_uuids[record]
+            current = self._by_uuid.get(order_uuid)
+            if current is not None and current.__class__ is not int:
+                # another caller built it first (and it may since have been archived)
+                return current if current.__class__ is Order else self._thaw(current)
+
+            order = self._build_record(record)
+            if current is not None:
+                self._by_uuid[order_uuid] = order
+                self._slots[self._slot_by_uuid[order_uuid] - 1] = order
+                self._cold_count -= 1
+                self._track(order)
+                # an unpaid order can't be archived itself, so make room among the paid ones
+                self._archive_excess()
+            return order
+
+    def _build_record(self, record: int) -> Order:
+        return Order.restore(self._record_uuids[record], *self.snapshot.read(record))
+
+    def _archive_excess(self):
+        if self._hot_limit is None:
+            return
+        while len(self._by_uuid) - self._cold_count > self._hot_limit and self._archivable:
+            order_uuid = self._archivable.popleft()
+            order = self._by_uuid.get(order_uuid)
+            if order.__class__ is not Order:
+                # removed, or archived already
+                continue
+            record = self._freeze(order)
+            self._by_uuid[order_uuid] = record
+            self._slots[self._slot_by_uuid[order_uuid] - 1] = record
+            self._cold_count += 1
+
+    def _freeze(self, order: Order) -> bytes:
+        # a paid order can't change, so it's read without its lock (which its writers may hold while calling in)
+        record = bytearray(self.COLD.pack(order.uuid.bytes, order.service_type.value, order.has_loyalty_card))
+        for item, line in order.items.items():
+            index = self._cold_item_index.get(item)
+            if index is None:
+                index = self._cold_item_index[item] = len(self._cold_items)
+                self._cold_items.append(item)
+            record += self.COLD_LINE.pack(index, line.quantity)
+        return bytes(record)
+
+    def _thaw(self, record: bytes) -> Order:
+        order_uuid, service_type, loyalty = self.COLD.unpack_from(record)
+        items = self._cold_items
+        return Order.restore(
+            uuid.UUID(bytes=order_uuid), ServiceType(service_type), bool(loyalty), True,
+            ((items[item], quantity) for item, quantity in self.COLD_LINE.iter_unpack(memoryview(record)[self.COLD.size:])),
+        )
+
+    def add(self, order: Order, new: bool = False) -> int:
+        """Add an order in uuid order and return its 1-based position.
+
+        A `new` order is given a fresh uuid (replacing any it has), so it sorts after every
+        order already here; other orders, such as replayed ones, keep theirs.
+        """
+        with self._lock:
+            if new:
+                order.uuid = ORDER_IDS.next()
+            position = self._add(order)
+            self._by_uuid[order.uuid] = order
+            self._track(order)
+            self._archive_excess()
+            return position
+
+    def extend(self, orders: Iterable[Order], new: bool = False) -> int:
+        """Add many orders under a single acquisition of the lock, giving `new` ones fresh uuids; return the new count."""
+        with self._lock:
+            for order in orders:
+                if new:
+                    order.uuid = ORDER_IDS.next()
+                self._add(order)
+                self._by_uuid[order.uuid] = order
+                self._track(order)
+            self._archive_excess()
+            return len(self._by_uuid)
+
+    def _track(self, order: Order):
+        # an order added already paid (replayed, or restored) can be archived straight away
+        if order.paid and self._hot_limit is not None:
+            self._archivable.append(order.uuid)
+
+    def _add(self, order: Order) -> int:
+        key = self._key(order.uuid)
+        if self._keys and key < self._keys[-1]:
+            # made before the newest order but added after it (replayed from a journal, say)
+            return self._insert(order, key)
+        self._append(self._slots, self._slot_by_uuid, self._tree, self._keys, order, order.uuid, key)
+        return len(self._by_uuid) + 1
+
+    def _insert(self, order: Order, key: int) -> int:
+        slot = bisect.bisect_right(self._keys, key)
+        # copy everything before its place, then append it and re-append the (few) later slots,
+        # swapping the copies in at the end so lock-free readers never see them half-built
+        slots, tree, keys = self._slots[:slot], self._tree[:slot + 1], self._keys[:slot]
+        self._append(slots, self._slot_by_uuid, tree, keys, order, order.uuid, key)
+        for entry, entry_key in zip(self._slots[slot:], self._keys[slot:]):
+            if entry is not None:
+                self._append(slots, self._slot_by_uuid, tree, keys, entry, self._uuid_of(entry), entry_key)
+        self._slots, self._tree, self._keys = slots, tree, keys
+        return self._prefix(tree, slot + 1)
+
+    def _uuid_of(self, entry: Order | int | bytes) -> uuid.UUID:
+        if entry.__class__ is int:
+            return self._record_uuids[entry]
+        if entry.__class__ is bytes:
+            return uuid.UUID(bytes=entry[:16])
+        return entry.uuid
+
+    def remove(self, order_uuid: uuid.UUID) -> Order | None:
+        """Remove an order by uuid, returning it (or None if unknown)."""
+        with self._lock:
+            order = self._by_uuid.pop(order_uuid, None)
+            if order is None:
+                return None
+            if order.__class__ is not Order:
+                order = self._build_record(order) if order.__class__ is int else self._thaw(order)
+                self._cold_count -= 1
+
+            slot = self._slot_by_uuid.pop(order_uuid)
+            self._slots[slot - 1] = None
+            self._update(slot, -1)
+
+            # compact once tombstones outnumber live orders, keeping removal amortised O(log n)
+            if len(self._slots) > 2 * len(self._by_uuid) + 32:
+                self._compact()
+            return order
+
+    def at(self, position: int) -> Order | None:
+        """Return the order at a 1-based position, or None if out of range."""
+        with self._lock:
+            if not 1 <= position <= len(self._by_uuid):
+                return None
+
+            order = self._slots[self._find(position)]
+            return order if order.__class__ is Order else self._resolve(order)
+
+    def page(self, start: int, count: int) -> list[Order]:
+        """Return up to `count` orders from the 1-based position `start` on."""
+        with self._lock:
+            if not 1 <= start <= len(self._by_uuid):
+                return []
+            slots = self._slots
+            slot = self._find(start)
+            orders = []
+            while slot < len(slots) and len(orders) < count:
+                order = slots[slot]
+                if order is not None:
+                    orders.append(order if order.__class__ is Order else self._resolve(order))
+                slot += 1
+            return orders
+
+    def created_between(self, start: float, end: float) -> tuple[int, list[Order]]:
+        """Return the orders created from unix time `start` up to `end`, and the position of the first."""
+        with self._lock:
+            # a uuid's timestamp is its top 48 bits, so the range's bounds are keys too
+            low = bisect.bisect_left(self._keys, int(start * 1000) << 80)
+            high = bisect.bisect_left(self._keys, int(end * 1000) << 80)
+            orders = [
+                order if order.__class__ is Order else self._resolve(order)
+                for order in self._slots[low:high] if order is not None
+            ]
+            return self._prefix(self._tree, low) + 1, orders
+
+    def _find(self, position: int) -> int:
+        # descend the tree to find the smallest slot whose prefix count equals `position`; return its index
+        slot = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            next_slot = slot + step
+            if next_slot < len(self._tree) and self._tree[next_slot] < position:
+                slot = next_slot
+                position -= self._tree[next_slot]
+            step >>= 1
+        return slot
+
+    def position(self, order: Order) -> int | None:
+        """Return the 1-based position of an order, or None if it isn't stored."""
+        with self._lock:
+            slot = self._slot_by_uuid.get(order.uuid)
+            return None if slot is None else self._prefix(self._tree, slot)
+
+    @staticmethod
+    def _prefix(tree: list[int], slot: int) -> int:
+        total = 0
+        while slot > 0:
+            total += tree[slot]
+            slot -= slot & -slot
+        return total
+
+    @staticmethod
+    def _key(order_uuid: uuid.UUID) -> int:
+        # a time-ordered uuid sorts by its value; older, random ones all sort first
+        value = order_uuid.int
+        return value if (value >> 76) & 0xF == 7 else 0
+
+    @classmethod
+    def _append(cls, slots: list, slot_by_uuid: dict, tree: list[int], keys: list[int], order: Order | int | bytes,
+                order_uuid: uuid.UUID, key: int):
+        slots.append(order)
+        keys.append(key)
+        slot = len(slots)
+        slot_by_uuid[order_uuid] = slot
+        # a fenwick node covers (slot - lowbit(slot), slot], so it can be appended in O(log n)
+        tree.append(1 + cls._prefix(tree, slot - 1) - cls._prefix(tree, slot - (slot & -slot)))
+
+    def _update(self, slot: int, delta: int):
+        while slot < len(self._tree):
+            self._tree[slot] += delta
+            slot += slot & -slot
+
+    def _compact(self):
+        # build fresh indexes off to the side, then swap them in, so lock-free readers never see a partial one
+        slots, slot_by_uuid, tree, keys = [], {}, [0], []
+        # carry snapshot and archived records over as they are, rather than building every order
+        uuids = [None] * len(self._slots)
+        for order_uuid, slot in self._slot_by_uuid.items():
+            uuids[slot - 1] = order_uuid
+        for order, order_uuid, key in zip(self._slots, uuids, self._keys):
+            if order is not None:
+                self._append(slots, slot_by_uuid, tree, keys, order, order_uuid, key)
+        self._slots, self._slot_by_uuid, self._tree, self._keys = slots, slot_by_uuid, tree, keys
+
+class Journal:
+    """Append-only, tab-separated log of order events, fsynced in groups by a background thread.
+
+    Every event is written through to the OS immediately, so it survives a crash of this
+    process; only the fsync to disk is batched, which keeps it off the REPL's critical path.
+    """
+    def __init__(self, path: str, sync_interval: float = 0.2):
+        self.path = path
+        self.sync_interval = sync_interval
+        self._trim_torn_tail(path)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._closed = False
+        self._sync_thread = threading.Thread(target=self._sync_loop, name="journal-sync", daemon=True)
+        self._sync_thread.start()
+
+    @staticmethod
+    def _trim_torn_tail(path: str):
+        """Cut a torn final line (from a crash mid-write) off the file, so the next append starts a line of its own."""
+        try:
+            file = open(path, "r+b")
+        except FileNotFoundError:
+            return
+
+        with file:
+            size = end = file.seek(0, os.SEEK_END)
+            # read back a block at a time to the last newline
+            keep = 0
+            while end > 0:
+                start = max(0, end - 4096)
+                file.seek(start)
+                newline = file.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    keep = start + newline + 1
+                    break
+                end = start
+            if keep < size:
+                file.truncate(keep)
+                os.fsync(file.fileno())
+
+    def append(self, *records: tuple):
+        """Write one or more event records as a single append."""
+        data = "".join("\t".join(map(str, record)) + "\n" for record in records)
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+        self._dirty.set()
+
+    def _sync_loop(self):
+        while True:
+            self._dirty.wait()
+            if self._closed:
+                return
+            # let a group of events build up, then pay for a single fsync
+            time.sleep(self.sync_interval)
+            self._dirty.clear()
+            with self._lock:
+                if self._closed:
+                    return
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        """Flush and fsync any pending events, then close the file."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self._dirty.set()
+
+    @staticmethod
+    def read(path: str):
+        """Yield each complete event record in the journal at `path`, via a memory map."""
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return
+
+        with file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for line in iter(data.readline, b""):
+                    # a torn final line (crash mid-write) has no newline and is ignored
+                    if line.endswith(b"\n"):
+                        yield line[:-1].decode("utf-8").split("\t")
+
+@contextlib.contextmanager
+def gc_paused():
+    """Keep the cyclic garbage collector off for the block, for bulk loads that only allocate."""
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if collecting:
+            gc.enable()
+
+class SharedLock:
+    """A lock held shared by any number of threads at once, or exclusively by one.
+
+    Shared holders never wait behind a waiting exclusive one, so shared sections can nest; an
+    exclusive holder waits for the shared ones to finish, and keeps new ones out until it's done.
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._shared = 0
+        self._exclusive = False
+
+    @contextlib.contextmanager
+    def shared(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                if not self._shared:
+                    self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive and not self._shared)
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+class SnapshotRecords:
+    """The order and line records of a mapped snapshot, read one order at a time."""
+    def __init__(self, view: memoryview, orders_offset: int, lines_offset: int, items: list[OrderItem]):
+        self.view = view
+        self.orders_offset = orders_offset
+        self.lines_offset = lines_offset
+        # the snapshot's items, by item record
+        self.items = items
+
+    def read(self, record: int) -> tuple[ServiceType, bool, bool, list[tuple[OrderItem, int]]]:
+        """Return an order record's service type, loyalty card, paid flag and (item, quantity) lines."""
+        _, service_type, loyalty, paid, lines = self.raw(record)
+        items = self.items
+        return (ServiceType(service_type), bool(loyalty), bool(paid),
+                [(items[item], quantity) for item, quantity in Snapshot.LINE.iter_unpack(lines)])
+
+    def units(self, record: int) -> int:
+        """Return the number of units an order record holds."""
+        return sum(quantity for _, quantity in Snapshot.LINE.iter_unpack(self.raw(record)[4]))
+
+    def raw(self, record: int) -> tuple[bytes, int, int, int, memoryview]:
+        """Return an order record's uuid, service type, loyalty card and paid flag as stored, and its packed line records."""
+        order_uuid, service_type, loyalty, paid, first_line, lines = Snapshot.ORDER.unpack_from(
+            self.view, self.orders_offset + record * Snapshot.ORDER.size)
+        start = self.lines_offset + first_line * Snapshot.LINE.size
+        return order_uuid, service_type, loyalty, paid, self.view[start:start + lines * Snapshot.LINE.size]
+
+class Snapshot:
+    """Compact binary image of an OrderManager's orders, current order and sales.
+
+    Layout, little-endian: a header; the menu items in use, interned as fixed-width records
+    followed by their names and categories; a fixed-width record per order pointing at its run
+    of fixed-width line records; the sales ledger, column by column; the ids of imported orders;
+    then the kitchen's tickets. Loading maps the file and builds each order straight from its
+    record the first time it's used.
+    """
+    MAGIC = b"PPSNAP\x00\x03"
+    # snapshots from before the kitchen was saved, which end after the imports
+    MAGIC_V2 = b"PPSNAP\x00\x02"
+    # snapshots from before imports, which end after the sales
+    MAGIC_V1 = b"PPSNAP\x00\x01"
+    # magic, current order uuid (zeros for none), then item, order, line and sale counts
+    HEADER = struct.Struct("<8s16sIIII")
+    # price, then the utf-8 lengths of the name and category that follow the item records
+    ITEM = struct.Struct("<dII")
+    # uuid, service type, loyalty card, paid, first line record, line count
+    ORDER = struct.Struct("<16sBBBxII")
+    # item record, quantity
+    LINE = struct.Struct("<II")
+    UUID = struct.Struct("16s")
+    # count of imported orders, then a record for each: its uuid and the utf-8 length of its external id
+    IMPORTS = struct.Struct("<I")
+    IMPORT = struct.Struct("<16sI")
+    # count of kitchen tickets, in progress (in the order started) then waiting, then a record for
+    # each: order uuid, service type, when it was paid, and when it was started (0 while waiting)
+    KITCHEN = struct.Struct("<I")
+    TICKET = struct.Struct("<16sBdd")
+
+    @classmethod
+    def save(cls, manager: OrderManager, path: str) -> tuple[int, int]:
+        """Write the manager's state to `path`, replacing it atomically; return the order and sale counts."""
+        items: dict[OrderItem, int] = {}
+        # records not yet built from the snapshot loaded are copied as they are, renumbering
+        # their items only if two of its items are now the same one
+        snapshot = manager.orders.snapshot
+        if snapshot is not None:
+            renumber = [items.setdefault(item, len(items)) for item in snapshot.items]
+            if renumber == list(range(len(renumber))):
+                renumber = None
+        order_records = bytearray()
+        line_records = bytearray()
+        line_count = 0
+        order_count = 0
+        # read without building orders that are still snapshot records, or archived
+        for order_uuid, entry in manager.orders.entries():
+            if entry.__class__ is int:
+                packed_uuid, service_type, loyalty, paid, lines = snapshot.raw(entry)
+                count = len(lines) // cls.LINE.size
+                order_records += cls.ORDER.pack(packed_uuid, service_type, loyalty, paid, line_count, count)
+                if renumber is None:
+                    line_records += lines
+                else:
+                    for item, quantity in cls.LINE.iter_unpack(lines):
+                        line_records += cls.LINE.pack(renumber[item], quantity)
+            else:
+                if entry.__class__ is Order:
+                    with entry.lock:
+                        service_type, loyalty, paid = entry.service_type, entry.has_loyalty_card, entry.paid
+                        lines = [(line.item, line.quantity) for line in entry.items.values()]
+                else:
+                    service_type, loyalty, lines = manager.orders.cold_fields(entry)
+                    paid = True
+                count = len(lines)
+                order_records += cls.ORDER.pack(order_uuid.bytes, service_type.value, loyalty, paid, line_count, count)
+                for item, quantity in lines:
+                    line_records += cls.LINE.pack(items.setdefault(item, len(items)), quantity)
+            line_count += count
+            order_count += 1
+
+        item_records = bytearray()
+        strings = bytearray()
+        for item in items:
+            name, category = item.name.encode("utf-8"), item.category.encode("utf-8")
+            item_records += cls.ITEM.pack(item.price, len(name), len(category))
+            strings += name + category
+
+        uuids, *columns = manager.daily_sales.columns()
+        if sys.byteorder != "little":
+            for column in columns:
+                column.byteswap()
+
+        current = manager.current_order_uuid.bytes if manager.current_order_uuid is not None else bytes(16)
+        with open(f"{path}.tmp", "wb") as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, current, len(items), order_count, line_count, len(uuids)))
+            file.write(item_records)
+            file.write(strings)
+            file.write(order_records)
+            file.write(line_records)
+            file.write(b"".join(order_uuid.bytes for order_uuid in uuids))
+            for column in columns:
+                file.write(column.tobytes())
+            imported = [(order_uuid, external_id.encode("utf-8")) for external_id, order_uuid in list(manager.imported.items())]
+            file.write(cls.IMPORTS.pack(len(imported)))
+            file.write(b"".join(cls.IMPORT.pack(order_uuid.bytes, len(external_id)) for order_uuid, external_id in imported))
+            file.write(b"".join(external_id for _, external_id in imported))
+            tickets = manager.kitchen.in_progress() + manager.kitchen.waiting()
+            file.write(cls.KITCHEN.pack(len(tickets)))
+            file.write(b"".join(
+                cls.TICKET.pack(ticket.order_uuid.bytes, ticket.service_type.value, ticket.paid_at, ticket.started_at or 0.0)
+                for ticket in tickets
+            ))
+        os.replace(f"{path}.tmp", path)
+        return order_count, len(uuids)
+
+    @staticmethod
+    def _uuids(packed: list[bytes]) -> list[uuid.UUID]:
+        """Build UUIDs from their 16 bytes, setting their fields as UUID itself does but skipping its argument checks."""
+        UUID, new, from_bytes, set_field = uuid.UUID, uuid.UUID.__new__, int.from_bytes, object.__setattr__
+        unknown = uuid.SafeUUID.unknown
+        uuids = []
+        for raw in packed:
+            value = new(UUID)
+            set_field(value, "int", from_bytes(raw))
+            set_field(value, "is_safe", unknown)
+            uuids.append(value)
+        return uuids
+
+    @classmethod
+    def load(cls, manager: OrderManager, path: str) -> tuple[int, int]:
+        """Replace the manager's orders, current order and sales with a snapshot's; return the order and sale counts."""
+        # a bulk load only allocates, so keep the collector from rescanning the heap as it grows
+        with gc_paused():
+            return cls._load(manager, path)
+
+    @classmethod
+    def _load(cls, manager: OrderManager, path: str) -> tuple[int, int]:
+        with open(path, "rb") as file:
+            # the mapping outlives the file object; it stays open for as long as orders may still be built from it
+            view = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+        magic, current, item_count, order_count, line_count, sale_count = cls.HEADER.unpack_from(view, 0)
+        if magic not in (cls.MAGIC, cls.MAGIC_V2, cls.MAGIC_V1):
+            raise ValueError("not a papa-pizza snapshot")
+
+        offset = cls.HEADER.size
+        item_fields = list(cls.ITEM.iter_unpack(view[offset:offset + cls.ITEM.size * item_count]))
+        offset += cls.ITEM.size * item_count
+        items = []
+        for price, name_length, category_length in item_fields:
+            name = bytes(view[offset:offset + name_length]).decode("utf-8")
+            category = bytes(view[offset + name_length:offset + name_length + category_length]).decode("utf-8")
+            offset += name_length + category_length
+            # share today's menu item when it's unchanged, as journal replay does
+            item = manager.catalog.get(name)
+            items.append(item if item is not None and item.price == price and item.category == category
+                         else make_menu_item(name, price, category))
+
+        orders_offset = offset
+        offset += cls.ORDER.size * order_count
+        lines_offset = offset
+        offset += cls.LINE.size * line_count
+
+        order_fields = list(cls.ORDER.iter_unpack(view[orders_offset:lines_offset]))
+        order_bytes = [fields[0] for fields in order_fields]
+        order_uuids = cls._uuids(order_bytes)
+        paid = bytes(fields[3] for fields in order_fields)
+        del order_fields
+
+        # sales mostly belong to orders still in the store, so share their uuids rather than building more
+        known = dict(zip(order_bytes, order_uuids))
+        sale_bytes = [record[0] for record in cls.UUID.iter_unpack(view[offset:offset + 16 * sale_count])]
+        sale_uuids = [known.get(raw) for raw in sale_bytes]
+        if None in sale_uuids:
+            sale_uuids = [sale_uuid or cls._uuids([raw])[0] for sale_uuid, raw in zip(sale_uuids, sale_bytes)]
+        offset += 16 * sale_count
+        columns = []
+        for typecode in ("d", "q", "b", "b", "b"):
+            column = array(typecode)
+            column.frombytes(view[offset:offset + column.itemsize * sale_count])
+            offset += column.itemsize * sale_count
+            if sys.byteorder != "little":
+                column.byteswap()
+            columns.append(column)
+
+        imported = {}
+        if magic != cls.MAGIC_V1:
+            (import_count,) = cls.IMPORTS.unpack_from(view, offset)
+            offset += cls.IMPORTS.size
+            strings = offset + cls.IMPORT.size * import_count
+            for raw, length in cls.IMPORT.iter_unpack(view[offset:strings]):
+                imported[bytes(view[strings:strings + length]).decode("utf-8")] = known.get(raw) or cls._uuids([raw])[0]
+                strings += length
+            offset = strings
+
+        kitchen = KitchenQueue(manager.kitchen.capacity)
+        if magic == cls.MAGIC:
+            (ticket_count,) = cls.KITCHEN.unpack_from(view, offset)
+            offset += cls.KITCHEN.size
+            kitchen.restore(
+                (known.get(raw) or cls._uuids([raw])[0], ServiceType(service_type), paid_at, started_at or None)
+                for raw, service_type, paid_at, started_at in cls.TICKET.iter_unpack(view[offset:offset + cls.TICKET.size * ticket_count])
+            )
+
+        manager.orders.load(order_uuids, paid, SnapshotRecords(view, orders_offset, lines_offset, items))
+        manager.daily_sales.restore(sale_uuids, *columns)
+        manager.imported.clear()
+        manager.imported.update(imported)
+        manager.kitchen = kitchen
+        manager.current_order_uuid = uuid.UUID(bytes=current) if any(current) else None
+        return order_count, sale_count
+
+class SalesSummary:
+    """Aggregates over a span of sales, as answered by `SalesLedger.summary`. Money is in cents."""
+    __slots__ = ("count", "total", "by_service_type", "discounted_count", "discounted_total", "loyalty_count")
+
+    def __init__(self, count: int, total: int, by_service_type: dict[ServiceType, tuple[int, int]],
+                 discounted_count: int, discounted_total: int, loyalty_count: int):
+        self.count = count
+        self.total = total
+        self.by_service_type = by_service_type
+        self.discounted_count = discounted_count
+        self.discounted_total = discounted_total
+        self.loyalty_count = loyalty_count
+
+    @property
+    def full_price_count(self) -> int:
+        return self.count - self.discounted_count
+
+    @property
+    def full_price_total(self) -> int:
+        return self.total - self.discounted_total
+
+    @property
+    def average_ticket(self) -> int:
+        # integer division rounding half up, so the average stays in whole cents
+        return (2 * self.total + self.count) // (2 * self.count) if self.count else 0
+
+    def as_dict(self) -> dict:
+        """Return the summary as plain data, for JSON."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "by_service_type": {service_type.name: list(totals) for service_type, totals in self.by_service_type.items()},
+            "discounted_count": self.discounted_count,
+            "discounted_total": self.discounted_total,
+            "loyalty_count": self.loyalty_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SalesSummary:
+        """Rebuild a summary from `as_dict` data."""
+        return cls(
+            data["count"], data["total"],
+            {ServiceType[name]: (count, total) for name, (count, total) in data["by_service_type"].items()},
+            data["discounted_count"], data["discounted_total"], data["loyalty_count"],
+        )
+
+    def merge(self, other: SalesSummary) -> SalesSummary:
+        """Fold another summary (of other sales) into this one, returning this one."""
+        self.count += other.count
+        self.total += other.total
+        for service_type, (count, total) in other.by_service_type.items():
+            current_count, current_total = self.by_service_type.get(service_type, (0, 0))
+            self.by_service_type[service_type] = (current_count + count, current_total + total)
+        self.discounted_count += other.discounted_count
+        self.discounted_total += other.discounted_total
+        self.loyalty_count += other.loyalty_count
+        return self
+
+class SalesLedger:
+    """Columnar, time-ordered record of the day's sales.
+
+    Alongside the columns, running (prefix) totals are kept after every sale, so the
+    aggregates for the whole day or for any time window are a binary search and a
+    subtraction away rather than a scan. Amounts are integer cents, so the running totals
+    never drift however many sales they accumulate.
+
+    Recording is serialised by a lock. Reads take no lock: a sale only becomes visible once
+    every column has been appended and `_count` is bumped, and readers never look past it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self.uuids: list[uuid.UUID] = []
+        self.timestamps = array("d")
+        self.amounts = array("q")
+        self.service_types = array("b")
+        self.discounted = array("b")
+        self.loyalty = array("b")
+        self._index: dict[uuid.UUID, int] = {}
+
+        # prefix columns: entry i aggregates sales [0, i), so each starts with a zero
+        self._total = array("q", [0])
+        self._discounted_count = array("l", [0])
+        self._discounted_total = array("q", [0])
+        self._loyalty_count = array("l", [0])
+        self._type_count = {service_type: array("l", [0]) for service_type in ServiceType}
+        self._type_total = {service_type: array("q", [0]) for service_type in ServiceType}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __contains__(self, order_uuid) -> bool:
+        return order_uuid in self._index
+
+    def __getitem__(self, order_uuid: uuid.UUID) -> int:
+        return self.amounts[self._index[order_uuid]]
+
+    def items(self):
+        """Yield (order uuid, amount) pairs in the order they were sold."""
+        return itertools.islice(zip(self.uuids, self.amounts), self._count)
+
+    def values(self):
+        return itertools.islice(self.amounts, self._count)
+
+    def export(self, file: TextIO) -> int:
+        """Write every sale to `file` in the sales export format read by `SalesReport`; return the count."""
+        count = self._count
+        file.write(SALES_EXPORT_HEADER)
+        for index in range(count):
+            file.write(f"{self.uuids[index]}\t{self.timestamps[index]!r}\t{self.amounts[index]}\t"
+                       f"{ServiceType(self.service_types[index]).name}\t{self.discounted[index]}\t{self.loyalty[index]}\n")
+        return count
+
+    def columns(self) -> tuple[list[uuid.UUID], array, array, array, array, array]:
+        """Return copies of the published columns: uuids, timestamps, amounts, service types, discounted, loyalty."""
+        count = self._count
+        return (self.uuids[:count], self.timestamps[:count], self.amounts[:count],
+                self.service_types[:count], self.discounted[:count], self.loyalty[:count])
+
+    def restore(self, uuids: list[uuid.UUID], timestamps: array, amounts: array, service_types: array, discounted: array, loyalty: array):
+        """Replace the ledger's contents with the given columns, rebuilding the running totals from them."""
+        def running(values) -> list:
+            return [0, *itertools.accumulate(values)]
+
+        with self._lock:
+            self.uuids, self.timestamps, self.amounts = uuids, timestamps, amounts
+            self.service_types, self.discounted, self.loyalty = service_types, discounted, loyalty
+            self._index = dict(zip(uuids, range(len(uuids))))
+
+            self._total = array("q", running(amounts))
+            self._discounted_count = array("l", running(discounted))
+            self._discounted_total = array("q", running(amount if flag else 0 for amount, flag in zip(amounts, discounted)))
+            self._loyalty_count = array("l", running(loyalty))
+            for service_type in ServiceType:
+                matches = [value == service_type.value for value in service_types]
+                self._type_count[service_type] = array("l", running(matches))
+                self._type_total[service_type] = array("q", running(amount if match else 0 for amount, match in zip(amounts, matches)))
+            self._count = len(uuids)
+
+    def record(self, order: Order, amount: int, timestamp: float | None = None) -> float | None:
+        """Record a sale of `amount` cents for `order`, returning its timestamp, or None if it was already recorded."""
+        with self._lock:
+            if order.uuid in self._index:
+                return None
+
+            # keep the timestamp column sorted even if the wall clock steps backwards
+            now = time.time() if timestamp is None else timestamp
+            if self.timestamps and now < self.timestamps[-1]:
+                now = self.timestamps[-1]
+
+            discounted = order.is_discounted
+            self.uuids.append(order.uuid)
+            self.timestamps.append(now)
+            self.amounts.append(amount)
+            self.service_types.append(order.service_type.value)
+            self.discounted.append(discounted)
+            self.loyalty.append(order.has_loyalty_card)
+
+            self._total.append(self._total[-1] + amount)
+            self._discounted_count.append(self._discounted_count[-1] + discounted)
+            self._discounted_total.append(self._discounted_total[-1] + (amount if discounted else 0))
+            self._loyalty_count.append(self._loyalty_count[-1] + order.has_loyalty_card)
+            for service_type in ServiceType:
+                matches = service_type is order.service_type
+                self._type_count[service_type].append(self._type_count[service_type][-1] + matches)
+                self._type_total[service_type].append(self._type_total[service_type][-1] + (amount if matches else 0))
+
+            # publish the sale to readers only once every column holds it
+            self._index[order.uuid] = self._count
+            self._count += 1
+            return now
+
+    @property
+    def total(self) -> int:
+        return self._total[self._count]
+
+    def summary(self, start: float | None = None, end: float | None = None) -> SalesSummary:
+        """Aggregate the sales timestamped within [start, end] (either bound optional) in O(log n)."""
+        count = self._count
+        low = 0 if start is None else bisect.bisect_left(self.timestamps, start, 0, count)
+        high = count if end is None else bisect.bisect_right(self.timestamps, end, 0, count)
+        high = max(low, high)
+
+        return SalesSummary(
+            count=high - low,
+            total=self._total[high] - self._total[low],
+            by_service_type={
+                service_type: (
+                    self._type_count[service_type][high] - self._type_count[service_type][low],
+                    self._type_total[service_type][high] - self._type_total[service_type][low],
+                )
+                for service_type in ServiceType
+            },
+            discounted_count=self._discounted_count[high] - self._discounted_count[low],
+            discounted_total=self._discounted_total[high] - self._discounted_total[low],
+            loyalty_count=self._loyalty_count[high] - self._loyalty_count[low],
+        )
+
+# one sale per line, tab-separated; lines starting with '#' are comments
+SALES_EXPORT_HEADER = "# papa-pizza sales\tuuid\ttimestamp\tamount_cents\tservice_type\tdiscounted\tloyalty\n"
+
+class SalesReport:
+    """Aggregates over exported sales files, built one file at a time and merged.
+
+    A report only ever holds totals, never the sales themselves, so reading a file streams it
+    and merging reports from many files (or many processes) costs the same however big they were.
+    """
+    def __init__(self):
+        self.files = 0
+        self.skipped = 0
+        self.count = 0
+        self.total = 0
+        self.discounted_count = 0
+        self.discounted_total = 0
+        self.loyalty_count = 0
+        self.by_service_type: dict[str, list[int]] = {service_type.name: [0, 0] for service_type in ServiceType}
+        # sales by local hour of day, across every day covered
+        self.hourly_count = array("q", bytes(8 * 24))
+        self.hourly_total = array("q", bytes(8 * 24))
+        self.first: float | None = None
+        self.last: float | None = None
+
+    @classmethod
+    def from_file(cls, path: str) -> SalesReport:
+        """Aggregate one sales export, reading it a line at a time."""
+        report = cls()
+        report.files = 1
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("#") or not line.strip():
+                    continue
+                try:
+                    _, timestamp, amount, service_type, discounted, loyalty = line.rstrip("\n").split("\t")
+                    report.add(float(timestamp), int(amount), service_type, discounted == "1", loyalty == "1")
+                except (ValueError, KeyError):
+                    report.skipped += 1
+        return report
+
+    def add(self, timestamp: float, amount: int, service_type: str, discounted: bool, loyalty: bool):
+        """Count one sale."""
+        totals = self.by_service_type[service_type]
+        totals[0] += 1
+        totals[1] += amount
+        self.count += 1
+        self.total += amount
+        if discounted:
+            self.discounted_count += 1
+            self.discounted_total += amount
+        self.loyalty_count += loyalty
+
+        hour = time.localtime(timestamp).tm_hour
+        self.hourly_count[hour] += 1
+        self.hourly_total[hour] += amount
+        self.first = timestamp if self.first is None else min(self.first, timestamp)
+        self.last = timestamp if self.last is None else max(self.last, timestamp)
+
+    def merge(self, other: SalesReport) -> SalesReport:
+        """Fold another report's aggregates into this one, returning this one."""
+        self.files += other.files
+        self.skipped += other.skipped
+        self.count += other.count
+        self.total += other.total
+        self.discounted_count += other.discounted_count
+        self.discounted_total += other.discounted_total
+        self.loyalty_count += other.loyalty_count
+        for service_type, (count, total) in other.by_service_type.items():
+            totals = self.by_service_type.setdefault(service_type, [0, 0])
+            totals[0] += count
+            totals[1] += total
+        for hour in range(24):
+            self.hourly_count[hour] += other.hourly_count[hour]
+            self.hourly_total[hour] += other.hourly_total[hour]
+        if other.first is not None:
+            self.first = other.first if self.first is None else min(self.first, other.first)
+            self.last = other.last if self.last is None else max(self.last, other.last)
+        return self
+
+    def as_dict(self) -> dict:
+        return {
+            "files": self.files,
+            "skipped_lines": self.skipped,
+            "orders": self.count,
+            "total_cents": self.total,
+            "by_service_type": {name.lower(): {"orders": count, "total_cents": total} for name, (count, total) in self.by_service_type.items()},
+            "discounted": {"orders": self.discounted_count, "total_cents": self.discounted_total},
+            "loyalty_orders": self.loyalty_count,
+            "hourly": [{"hour": hour, "orders": self.hourly_count[hour], "total_cents": self.hourly_total[hour]} for hour in range(24)],
+            "first": self.first,
+            "last": self.last,
+        }
+
+def parse_duration(text: str) -> float | None:
+    """Parse a duration like '90', '30m' or '2h' (bare numbers are minutes) into seconds."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    text = text.strip().lower()
+    unit = units.get(text[-1:], None)
+    number = text[:-1] if unit is not None else text
+    try:
+        value = float(number)
+    except ValueError:
+        return None
+    return value * (unit or 60) if value > 0 else None
+
+def parse_time_of_day(text: str) -> float | None:
+    """Parse a time today like '18:00', '18:30:15', '6pm' or '6:30am' into a unix time."""
+    text = text.strip().lower()
+    suffix = text[-2:] if text[-2:] in ("am", "pm") else None
+    fields = (text[:-2] if suffix else text).strip().split(":")
+    if not 1 <= len(fields) <= 3 or not all(field.isdigit() for field in fields):
+        return None
+    hour, minute, second = (int(field) for field in fields + ["0"] * (3 - len(fields)))
+    if suffix is not None:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if suffix == "pm" else 0)
+    elif len(fields) == 1:
+        # a bare number is ambiguous between an hour and a duration, so want a colon or am/pm
+        return None
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+
+    today = time.localtime()
+    return time.mktime((today.tm_year, today.tm_mon, today.tm_mday, hour, minute, second, 0, 0, -1))
+
+class OrderImport:
+    """Streaming import of orders exported by another system (online or phone ordering), as CSV or JSONL.
+
+    Each stage is a generator -- parse, validate against the menu, price -- so orders flow through
+    one at a time and are taken off the end in batches; memory stays flat however big the file.
+    Bad orders are counted and the first few kept for the report, without stopping the import.
+    Orders already imported under the same external id are skipped, so re-running one is harmless.
+
+    CSV has a header row with `id`, `service` and `item` columns, and optionally `quantity` and
+    `loyalty`; one row per line item, with consecutive rows of the same id making up one order.
+    JSONL has one order per line: {"id": ..., "service": ..., "loyalty": ..., "items": [{"name": ..., "quantity": ...}]}.
+    """
+    # orders added to the store, and journaled, together
+    BATCH_SIZE = 1000
+    # rejects kept for the report; the rest are only counted
+    MAX_REJECTS = 10
+    FLAGS = {"": False, "0": False, "n": False, "no": False, "false": False, "1": True, "y": True, "yes": True, "true": True}
+
+    def __init__(self, catalog: MenuCatalog, imported: dict[str, uuid.UUID]):
+        self.catalog = catalog
+        self.imported = imported
+        self.added = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.total_cents = 0
+        self.rejects: list[tuple[int, str]] = []
+
+    def batches(self, file: TextIO) -> Iterator[tuple[tuple[str, Order], ...]]:
+        """Yield batches of (external id, priced order) for each valid order in `file` not imported before."""
+        return itertools.batched(self._price(self._validate(self._parse(file))), self.BATCH_SIZE)
+
+    def _reject(self, line: int, reason: str):
+        self.rejected += 1
+        if len(self.rejects) < self.MAX_REJECTS:
+            self.rejects.append((line, reason))
+
+    def _parse(self, file: TextIO):
+        # a JSONL file starts with an object; anything else is taken as CSV
+        first = file.readline()
+        while first and not first.strip():
+            first = file.readline()
+        lines = itertools.chain([first], file)
+        return self._parse_jsonl(lines) if first.lstrip().startswith("{") else self._parse_csv(lines)
+
+    def _parse_jsonl(self, lines: Iterable[str]):
+        for line, text in enumerate(lines, start=1):
+            if not text.strip():
+                continue
+            try:
+                entry = json.loads(text)
+                items = [(item["name"], item.get("quantity")) for item in entry["items"]]
+                yield line, entry["id"], entry["service"], entry.get("loyalty"), items
+            except KeyError as error:
+                self._reject(line, f"order is missing {error}")
+            except (ValueError, TypeError, AttributeError):
+                self._reject(line, "not a valid JSON order")
+
+    def _parse_csv(self, lines: Iterable[str]):
+        reader = csv.DictReader(lines)
+        if reader.fieldnames is None:
+            return
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        missing = {"id", "service", "item"}.difference(reader.fieldnames)
+        if missing:
+            self._reject(1, f"missing column(s): {', '.join(sorted(missing))}")
+            return
+
+        # gather each run of rows with the same id into one order
+        current = None
+        for row in reader:
+            external_id = row["id"]
+            if current is not None and external_id == current[1]:
+                current[4].append((row["item"], row.get("quantity")))
+                continue
+            if current is not None:
+                yield current
+            current = (reader.line_num, external_id, row["service"], row.get("loyalty"), [(row["item"], row.get("quantity"))])
+        if current is not None:
+            yield current
+
+    def _validate(self, records):
+        for line, external_id, service, loyalty, lines in records:
+            external_id = str(external_id if external_id is not None else "").strip()
+            if not external_id or not external_id.isprintable():
+                self._reject(line, "missing or unprintable order id")
+                continue
+            if external_id in self.imported:
+                self.skipped += 1
+                continue
+
+            try:
+                service_type = ServiceType[str(service).strip().upper()]
+            except KeyError:
+                self._reject(line, f"order {external_id}: invalid service type '{service}'")
+                continue
+            has_loyalty = loyalty if type(loyalty) is bool else self.FLAGS.get(str(loyalty if loyalty is not None else "").strip().lower())
+            if has_loyalty is None:
+                self._reject(line, f"order {external_id}: invalid loyalty flag '{loyalty}'")
+                continue
+
+            items: dict[OrderItem, int] = {}
+            reason = None if lines else "no items"
+            for name, quantity in lines:
+                item = self.catalog.get(str(name or ""))
+                if item is None:
+                    reason = f"unknown item '{name}'"
+                    break
+                count = self._quantity(quantity)
+                if count is None:
+                    reason = f"invalid quantity '{quantity}' of {item.name}"
+                    break
+                items[item] = items.get(item, 0) + count
+            if reason is not None:
+                self._reject(line, f"order {external_id}: {reason}")
+                continue
+
+            yield external_id, service_type, has_loyalty, items
+
+    @staticmethod
+    def _quantity(value) -> int | None:
+        if value is None or value == "":
+            return 1
+        if isinstance(value, str):
+            value = value.strip()
+            if not value.isdigit():
+                return None
+            value = int(value)
+        elif type(value) is not int:
+            return None
+        return value if value > 0 else None
+
+    def _price(self, orders):
+        for external_id, service_type, has_loyalty, items in orders:
+            # the store gives each its uuid as it's added
+            yield external_id, Order.restore(None, service_type, has_loyalty, False, items.items())
+
+class KitchenFull(Exception):
+    """Raised when a paid order can't be queued because the kitchen is at capacity."""
+
+class KitchenTicket:
+    """A paid order's place in the kitchen: when it was paid, when it must be ready, and when work started."""
+    __slots__ = ("order_uuid", "service_type", "paid_at", "ready_by", "started_at")
+
+    def __init__(self, order_uuid: uuid.UUID, service_type: ServiceType, paid_at: float, ready_by: float):
+        self.order_uuid = order_uuid
+        self.service_type = service_type
+        self.paid_at = paid_at
+        self.ready_by = ready_by
+        self.started_at: float | None = None
+
+    def as_dict(self) -> dict:
+        """Return the ticket as plain data, for JSON."""
+        return {
+            "order_uuid": str(self.order_uuid),
+            "service_type": self.service_type.name,
+            "paid_at": self.paid_at,
+            "ready_by": self.ready_by,
+            "started_at": self.started_at,
+        }
+
+class KitchenQueue:
+    """Bounded priority queue of paid orders for the kitchen, soonest promise first.
+
+    Each order is promised a ready-by time from when it was paid, by service type; on equal
+    promises delivery goes first, since it still has to travel. Queueing and starting the next
+    order are O(log n) heap operations. Starting a particular order marks its heap entry stale
+    instead of searching for it, and stale entries are skipped as they surface.
+
+    An optional capacity bounds the orders waiting to be started. `offer` raises KitchenFull when
+    there's no room, so the caller can hold off taking payment; with no capacity, nothing is refused.
+    """
+    PREP_MINUTES = {ServiceType.DELIVERY: 15, ServiceType.PICKUP: 20}
+    RANK = {ServiceType.DELIVERY: 0, ServiceType.PICKUP: 1}
+
+    def __init__(self, capacity: int | None = None):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        # heap of (ready by, service rank, sequence, ticket); the sequence keeps ties first-come first-served
+        self._heap: list[tuple[float, int, int, KitchenTicket]] = []
+        self._sequence = itertools.count()
+        self._waiting: dict[uuid.UUID, KitchenTicket] = {}
+        self._in_progress: dict[uuid.UUID, KitchenTicket] = {}
+
+    def __len__(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def full(self) -> bool:
+        return self.capacity is not None and len(self._waiting) >= self.capacity
+
+    def _ticket(self, order_uuid: uuid.UUID, service_type: ServiceType, paid_at: float) -> KitchenTicket:
+        return KitchenTicket(order_uuid, service_type, paid_at, paid_at + self.PREP_MINUTES[service_type] * 60)
+
+    def _push(self, ticket: KitchenTicket) -> KitchenTicket:
+        heapq.heappush(self._heap, (ticket.ready_by, self.RANK[ticket.service_type], next(self._sequence), ticket))
+        self._waiting[ticket.order_uuid] = ticket
+        return ticket
+
+    def offer(self, order: Order, paid_at: float | None = None, force: bool = False) -> KitchenTicket:
+        """Queue a paid order, raising KitchenFull if there's no room (unless `force`, as when replaying)."""
+        with self._lock:
+            if self.full and not force:
+                raise KitchenFull(len(self._waiting))
+            return self._push(self._ticket(order.uuid, order.service_type, time.time() if paid_at is None else paid_at))
+
+    def restore(self, tickets: Iterable[tuple[uuid.UUID, ServiceType, float, float | None]]):
+        """Queue saved tickets, as (order uuid, service type, paid at, started at or None), whatever the capacity.
+
+        In-progress tickets should come in the order they were started, and waiting ones in the
+        order they're to be started, so both keep their places.
+        """
+        with self._lock:
+            for order_uuid, service_type, paid_at, started_at in tickets:
+                ticket = self._ticket(order_uuid, service_type, paid_at)
+                if started_at is None:
+                    self._push(ticket)
+                else:
+                    ticket.started_at = started_at
+                    self._in_progress[order_uuid] = ticket
+
+    def start(self, order_uuid: uuid.UUID | None = None, now: float | None = None) -> KitchenTicket | None:
+        """Move the most urgent waiting order (or the given one) to in progress; return its ticket, or None."""
+        with self._lock:
+            if order_uuid is None:
+                ticket = None
+                while self._heap:
+                    candidate = heapq.heappop(self._heap)[3]
+                    # entries for orders already started by uuid are stale
+                    if self._waiting.get(candidate.order_uuid) is candidate:
+                        ticket = candidate
+                        break
+            else:
+                ticket = self._waiting.get(order_uuid)
+            if ticket is None:
+                return None
+
+            del self._waiting[ticket.order_uuid]
+            ticket.started_at = time.time() if now is None else now
+            self._in_progress[ticket.order_uuid] = ticket
+            # don't let stale entries pile up behind a queue that's mostly started by uuid
+            if len(self._heap) > 2 * len(self._waiting) + 32:
+                self._heap = [entry for entry in self._heap if self._waiting.get(entry[3].order_uuid) is entry[3]]
+                heapq.heapify(self._heap)
+            return ticket
+
+    def complete(self, order_uuid: uuid.UUID | None = None) -> KitchenTicket | None:
+        """Finish the given in-progress order, or the one started longest ago; return its ticket, or None."""
+        with self._lock:
+            if order_uuid is None:
+                # dicts keep insertion order, so the first in-progress ticket was started first
+                order_uuid = next(iter(self._in_progress), None)
+            return self._in_progress.pop(order_uuid, None)
+
+    def waiting(self) -> list[KitchenTicket]:
+        """Return the waiting tickets, most urgent first."""
+        with self._lock:
+            return [entry[3] for entry in sorted(self._heap) if self._waiting.get(entry[3].order_uuid) is entry[3]]
+
+    def in_progress(self) -> list[KitchenTicket]:
+        """Return the tickets being worked on, in the order they were started."""
+        with self._lock:
+            return list(self._in_progress.values())
+
+class LatencyHistogram:
+    """Count observed durations in log-spaced buckets, four per doubling from 1µs to about 30s.
+
+    Percentiles are read off the buckets, so they are accurate to within a bucket (about 19%)
+    whatever the number of observations, and observing is a binary search and an increment.
+    """
+    BOUNDS = array("d", [1e-6 * 2 ** (index / 4) for index in range(4 * 25)])
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        # the final bucket catches anything beyond the last bound
+        self.counts = array("q", bytes(8 * (len(self.BOUNDS) + 1)))
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Return the upper bound of the bucket holding the given fraction (e.g. 0.95) of observations."""
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.BOUNDS[index], self.max) if index < len(self.BOUNDS) else self.max
+        return 0.0
+
+    def cumulative_buckets(self):
+        """Yield (upper bound, cumulative count) at each doubling, as a Prometheus histogram wants."""
+        seen = 0
+        for index, count in enumerate(self.counts[:len(self.BOUNDS)]):
+            seen += count
+            if index % 4 == 0:
+                yield self.BOUNDS[index], seen
+
+class Metrics:
+    """Per-command and per-operation latency histograms, collected only while enabled.
+
+    When disabled, an instrumented call costs one attribute check. Observations take a lock,
+    as commands run concurrently when serving many terminals.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.started = time.time()
+        # {"command": {"order create": histogram, ...}, "operation": {...}}
+        self.histograms: dict[str, dict[str, LatencyHistogram]] = {"command": {}, "operation": {}}
+
+    def observe(self, kind: str, name: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms[kind].get(name)
+            if histogram is None:
+                histogram = self.histograms[kind][name] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            for histograms in self.histograms.values():
+                histograms.clear()
+
+    def prometheus(self, gauges: dict[str, tuple[str, float]]) -> str:
+        """Render every histogram, and the given {name: (help, value)} gauges, in Prometheus text format."""
+        lines = []
+        for name, (help_text, value) in gauges.items():
+            lines += [f"# HELP papa_pizza_{name} {help_text}", f"# TYPE papa_pizza_{name} gauge", f"papa_pizza_{name} {value}"]
+
+        with self._lock:
+            for kind, histograms in self.histograms.items():
+                metric = f"papa_pizza_{kind}_seconds"
+                lines += [f"# HELP {metric} time taken per {kind}", f"# TYPE {metric} histogram"]
+                for name, histogram in sorted(histograms.items()):
+                    label = f'{kind}="{name}"'
+                    for bound, count in histogram.cumulative_buckets():
+                        lines.append(f'{metric}_bucket{{{label},le="{bound:g}"}} {count}')
+                    lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{metric}_sum{{{label}}} {histogram.sum!r}")
+                    lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+def instrumented(operation: str):
+    """Decorate an OrderManager operation so its latency is recorded while metrics are enabled."""
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                METRICS.observe("operation", operation, time.perf_counter() - started)
+        return wrapper
+    return decorate
 
-        return cost * 1.1 # add 10% GST
-    
 class OrderManager:
     """Manage creation, modification, processing, and listing of multiple orders."""
-    def __init__(self):
+    # orders per page of 'order list'
+    PAGE_SIZE = 50
+
+    def __init__(self, journal: Journal | None = None, catalog: MenuCatalog | None = None):
         # initialise the Papa Pizza system with empty order list and daily sales dictionary
-        self.orders: list[Order] = []
+        self.orders = OrderStore()
         self.current_order_uuid = None
-        self.daily_sales = {}
-
-    def print_order(self, order, with_index: bool = True):
-        """Display details of a single order, optionally numbered."""
-        if with_index:
+        self.daily_sales = SalesLedger()
+        self.kitchen = KitchenQueue()
+        self.journal = journal
+        self.catalog = catalog or MenuCatalog(menu)
+        # uuid of each order imported from another system, by its id there
+        self.imported: dict[str, uuid.UUID] = {}
+        self._import_lock = threading.Lock()
+        # held shared by every change to orders, sales and the kitchen, and exclusively while saving a snapshot
+        self._changes = SharedLock()
+
+    def session_view(self) -> "OrderManager":
+        """Return a manager sharing this one's orders, sales, kitchen, journal and menu, but with its own current order."""
+        view = OrderManager(self.journal, self.catalog)
+        view.orders = self.orders
+        view.daily_sales = self.daily_sales
+        view.kitchen = self.kitchen
+        view.imported = self.imported
+        view._import_lock = self._import_lock
+        view._changes = self._changes
+        return view
+
+    def _record(self, *records: tuple):
+        """Append events to the journal, if there is one."""
+        if self.journal is not None:
+            self.journal.append(*records)
+
+    def replay(self, records) -> tuple[int, int]:
+        """Rebuild state from journal records without printing or re-journaling; return the counts applied and skipped as malformed."""
+        # items priced differently from today's menu (or no longer on it) are rebuilt from the journal
+        past_items: dict[tuple[str, float], OrderItem] = {}
+
+        def journaled_item(name: str, price: str | None) -> OrderItem:
+            item = self.catalog.get(name)
+            if price is None or (item is not None and item.price == float(price)):
+                return item
+            key = (name, float(price))
+            if key not in past_items:
+                past_items[key] = make_menu_item(name, float(price), item.category if item is not None else "Pizza")
+            return past_items[key]
+
+        # parsing uuids dominates replay, so each one is parsed once and then looked up by its text
+        uuids: dict[str, uuid.UUID] = {}
+
+        def parse_uuid(text: str) -> uuid.UUID:
+            order_uuid = uuids.get(text)
+            if order_uuid is None:
+                order_uuid = uuids[text] = uuid.UUID(text)
+            return order_uuid
+
+        count = skipped = 0
+        for record in records:
             try:
-                index = self.orders.index(order) + 1 if with_index else None
-            except ValueError:
-                cprint("order not found in the list.", "red")
+                event, *fields = record
+                if event == "create":
+                    order = Order([], ServiceType[fields[1]], fields[2] == "1", parse_uuid(fields[0]))
+                    self.orders.add(order)
+                    if len(fields) > 3:
+                        self.imported[fields[3]] = order.uuid
+                elif event == "switch":
+                    self.current_order_uuid = parse_uuid(fields[0]) if fields[0] else None
+                elif event == "add":
+                    order = self.orders.get(parse_uuid(fields[0]))
+                    item = journaled_item(fields[1], fields[3] if len(fields) > 3 else None)
+                    if order is None or item is None:
+                        continue
+                    order.add_item(item, int(fields[2]))
+                elif event == "remove_item":
+                    order = self.orders.get(parse_uuid(fields[0]))
+                    if order is None:
+                        continue
+                    self._remove_named_item(order, fields[1], int(fields[2]))
+                elif event == "pay":
+                    order = self.orders.get(parse_uuid(fields[0]))
+                    if order is None:
+                        continue
+                    # parsed before anything changes, so a malformed record leaves the order as it was
+                    # (journals written before prices were kept in cents hold dollars)
+                    amount = to_cents(float(fields[1])) if "." in fields[1] else int(fields[1])
+                    timestamp = float(fields[2])
+                    order.pay()
+                    self.daily_sales.record(order, amount, timestamp)
+                    # the kitchen had room when it was paid, so it's queued whatever the capacity now
+                    self.kitchen.offer(order, timestamp, force=True)
+                    self.orders.settled(order)
+                elif event == "start":
+                    self.kitchen.start(parse_uuid(fields[0]), float(fields[1]))
+                elif event == "done":
+                    self.kitchen.complete(parse_uuid(fields[0]))
+                elif event == "remove":
+                    order_uuid = parse_uuid(fields[0])
+                    self.orders.remove(order_uuid)
+                    if self.current_order_uuid == order_uuid:
+                        self.current_order_uuid = None
+                else:
+                    continue
+                count += 1
+            except (ValueError, KeyError, IndexError):
+                # a malformed record (a corrupted line, say) is skipped rather than ending the restore
+                skipped += 1
+        return count, skipped
+
+    def print_order(self, order, with_index: bool = True, index: int | None = None, renderer: Renderer | None = None):
+        """Display details of a single order, optionally numbered, into `renderer` (or straight to stdout)."""
+        if with_index:
+            if index is None:
+                index = self.orders.position(order)
+            if index is None:
+                print_error("order not found in the list.")
                 return
 
-            cprint(f"{index}. {order.service_type.name.lower()} order {order.uuid}:", "green")
-        else:
-            cprint(f"{order.service_type.name.lower()} order {order.uuid}:", "green")
+        with contextlib.nullcontext(renderer) if renderer is not None else Renderer() as renderer:
+            if with_index:
+                renderer.line(f"{index}. {order.service_type.name.lower()} order {order.uuid}:", "green")
+            else:
+                renderer.line(f"{order.service_type.name.lower()} order {order.uuid}:", "green")
+
+            renderer.line("\t" + f"items: {', '.join([f'{line.quantity}x {line.item.name}' for line in order.items.values()]) or 'none'}")
+            renderer.line("\t" + f"service type: {order.service_type.name}")
+            if order.created_at is not None:
+                renderer.line("\t" + f"created: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(order.created_at))}")
+            renderer.line("\t" + f"total cost: {format_cents(order.total_cents)}")
+            renderer.line("\t" + f"paid: {'yes' if order.paid else 'no'}")
+
+    @instrumented("order list")
+    def list_orders(self, page: str | None = None):
+        """List all orders, or one page of them, oldest first, or report none exist."""
+        if not self.orders:
+            cprint("no orders found :(", "red")
+            return
 
-        print("\t" + f"items: {', '.join([item.name for item in order.items]) or 'none'}")
-        print("\t" + f"service type: {order.service_type.name}")
-        print("\t" + f"total cost: ${order.total_cost:.2f}")
-        print("\t" + f"paid: {'yes' if order.paid else 'no'}")
+        if page is None:
+            self._print_orders(self.orders)
+            return
 
-    def list_orders(self):
-        """List all orders or report none exist."""
+        pages = -(-len(self.orders) // self.PAGE_SIZE)
+        if not page.isdigit() or not 1 <= int(page) <= pages:
+            print_error(f"invalid page; there are {pages} page(s) of {self.PAGE_SIZE} orders.")
+            return
+        start = (int(page) - 1) * self.PAGE_SIZE + 1
+        self._print_orders(self.orders.page(start, self.PAGE_SIZE), start)
+        cprint(f"page {page} of {pages}", "yellow")
+
+    @instrumented("order latest")
+    def list_latest_orders(self, count: str = "10"):
+        """List the most recently created orders, oldest of them first."""
+        if not count.isdigit() or int(count) < 1:
+            print_error("invalid number of orders")
+            return
         if not self.orders:
             cprint("no orders found :(", "red")
             return
 
-        for order in self.orders:
-            self.print_order(order)
+        start = max(1, len(self.orders) - int(count) + 1)
+        self._print_orders(self.orders.page(start, int(count)), start)
+
+    @instrumented("order between")
+    def list_orders_between(self, start: str, end: str):
+        """List orders created between two times today, such as 18:00 and 19:30, or 6pm and 7pm."""
+        start_time, end_time = parse_time_of_day(start), parse_time_of_day(end)
+        if start_time is None or end_time is None:
+            print_error("invalid time; try something like 18:00 or 6pm.")
+            return
+        if end_time <= start_time:
+            print_error("the end time must be after the start time.")
+            return
+
+        position, orders = self.orders.created_between(start_time, end_time)
+        if not orders:
+            cprint(f"no orders created between {start} and {end} :(", "red")
+            return
+        self._print_orders(orders, position)
+
+    def _print_orders(self, orders: Iterable[Order], start: int = 1):
+        """Print orders numbered from list position `start`, streaming long listings in large chunks."""
+        with Renderer(chunk_lines=4096) as renderer:
+            for index, order in enumerate(orders, start=start):
+                self.print_order(order, index=index, renderer=renderer)
 
     def _get_order_by_uuid(self, order_uuid: uuid.UUID) -> Order:  # changed parameter type from str to uuid.UUID
-        return next((order for order in self.orders if order.uuid == order_uuid), None)
+        return self.orders.get(order_uuid)
 
     # Add an order to the system
     def create_order(self, type: str | None = None):
         """Interactively prompt to create a new order with service type and loyalty flag."""
         # prompt service type
         if type is None:
-            type = input("Order type? (pickup/delivery): ").strip().lower()
+            type = ask("Order type? (pickup/delivery): ").strip().lower()
 
         try:
             service_type = ServiceType[type.upper()]
         except:
-            cprint("invalid service type!", "red")
+            print_error("invalid service type!")
             return
         
         # prompt loyalty card status
-        prompt = input("does customer have a loyalty card? (y/N): ").strip().lower()
+        prompt = ask("does customer have a loyalty card? (y/N): ").strip().lower()
         has_loyalty = parse_boolean_input(prompt, handle_invalid=True)
 
         order = self._create_order([], service_type, has_loyalty)
         if len(self.orders) > 1:
-            prompt = input("do you want to switch to this order? (y/N): ")
+            prompt = ask("do you want to switch to this order? (y/N): ")
             if parse_boolean_input(prompt, handle_invalid=False):
-                self._switch_order(self.orders.index(order) + 1)
+                self._switch_order(self.orders.position(order))
         else:
-            self._switch_order(self.orders.index(order) + 1)
+            self._switch_order(self.orders.position(order))
 
+    @instrumented("order create")
     def _create_order(self, items: list[OrderItem], service_type: ServiceType, has_loyalty: bool) -> Order:
         """Instantiate and register a new Order internally."""
-        order = Order(items, service_type, has_loyalty)
-        self.orders.append(order)
+        # the store gives it its uuid as it's added, so don't mint one here only to replace it
+        order = Order.restore(None, service_type, has_loyalty, False, Counter(items).items())
+        with self._changes.shared():
+            self.orders.add(order, new=True)
+            self._record(("create", order.uuid, service_type.name, int(has_loyalty)))
+            for line in order.items.values():
+                self._record(("add", order.uuid, line.item.name, line.quantity, repr(line.item.price)))
         cprint(f"order {order.uuid} created successfully!", "green")
         return order
 
@@ -183,78 +2307,97 @@ class OrderManager:
     def remove_order(self):
         """Interactively remove an order by its list index."""
         self.list_orders()
-        prompt = input(f"which order would you like to remove? (1-{len(self.orders)}):")
+        prompt = ask(f"which order would you like to remove? (1-{len(self.orders)}):")
 
         if not prompt.isdigit():
-            cprint("invalid order index", "red")
+            print_error("invalid order index")
             return
         
         order_index = int(prompt)
         if order_index < 1 or order_index > len(self.orders):
-            cprint("invalid order index", "red")
+            print_error("invalid order index")
             return
         
         self._remove_order(order_index)
 
+    @instrumented("order remove")
     def _remove_order(self, order_index: int):
         """Remove an order by its adjusted index and clear current selection if needed."""
-        # correct the order index to match the list index
-        true_order_index = order_index - 1
-        if self.current_order_uuid == self.orders[true_order_index].uuid:
+        order = self.orders.at(order_index)
+        if order is None:
+            print_error("invalid order index")
+            return
+
+        if self.current_order_uuid == order.uuid:
             self.current_order_uuid = None
         
-        self.orders.pop(true_order_index)
+        with self._changes.shared():
+            self.orders.remove(order.uuid)
+            self._record(("remove", order.uuid))
         cprint(f"order {order_index} removed successfully!", "green")
 
 
     # switch order focus    
-    def switch_order(self):
-        """Interactively switch the current focus to an existing order."""
-        self.list_orders()
-        prompt = input(f"which order would you like to switch to? (1-{len(self.orders)}): ")
+    def switch_order(self, order: str | None = None):
+        """Switch the current focus to an existing order, given by list position or uuid, or asked for."""
+        if order is None:
+            self.list_orders()
+            order = ask(f"which order would you like to switch to? (1-{len(self.orders)}): ")
+
+        if not order.isdigit():
+            try:
+                found = self.orders.get(uuid.UUID(order))
+            except ValueError:
+                found = None
+            if found is None:
+                print_error("no order with that uuid")
+                return
+            self._switch_order(self.orders.position(found))
+            return
 
-        if not prompt.isdigit() or int(prompt) < 1 or int(prompt) > len(self.orders):
-            cprint("invalid order index", "red")
+        if int(order) < 1 or int(order) > len(self.orders):
+            print_error("invalid order index")
             return
 
-        order_index = int(prompt)
+        order_index = int(order)
         self._switch_order(order_index)
 
+    @instrumented("order switch")
     def _switch_order(self, order_index: int) -> Order | None:
         """Switch focus internally to the chosen order index."""
-        true_order_index = order_index - 1
-        if 0 <= true_order_index < len(self.orders):
-            new_order = self.orders[true_order_index]
+        new_order = self.orders.at(order_index)
+        if new_order is not None:
             if self.current_order_uuid == new_order.uuid:
                 cprint("this is already your current order!", "yellow")
                 return None
             
             self.current_order_uuid = new_order.uuid
+            self._record(("switch", new_order.uuid))
             cprint(f"switched to order {new_order.uuid}", "green")
             return new_order
         else:
-            cprint("invalid order id; switch will not occur.", "red")
+            print_error("invalid order id; switch will not occur.")
             return None
 
     def _check_current_order(self):
         """Ensure there's a valid, unpaid current order or prompt next steps."""
         order = self._get_order_by_uuid(self.current_order_uuid)
         if order is None:
-            cprint("no current order selected.", "red")
+            print_error("no current order selected.")
             if self.orders:
-                prompt = input("would you like to select an order? (y/N): ")
+                prompt = ask("would you like to select an order? (y/N): ")
                 if parse_boolean_input(prompt, handle_invalid=True):
                     self.switch_order()
                     return
             else:
-                prompt = input("would you like to create an order? (y/N): ")
+                prompt = ask("would you like to create an order? (y/N): ")
                 if parse_boolean_input(prompt, handle_invalid=True):
                     self.create_order()
                     return
         else:
             if order.paid:
-                cprint("this order has already been paid for.", "red")
-                prompt = input("would you like to switch to a different order? (y/N): ")
+                print_error("this order has already been paid for.")
+                prompt = ask("would you like to switch to a different order? (y/N): ")
                 if parse_boolean_input(prompt, handle_invalid=True):
                     self.switch_order()
                     return
@@ -264,9 +2407,13 @@ class OrderManager:
         """Add a menu item in given quantity to the current order."""
         # Prompt for item if not provided
         if item is None:
-            item = input("enter the name of the menu item you'd like to add (or type 'menu' to review the options): ").strip().lower()
+            item = ask("enter the name of the menu item you'd like to add (or type 'menu' to review the options): ").strip().lower()
 
-        item = next((menu_item for menu_item in menu if menu_item.name.lower() == item), None)
+        name = item
+        item = self.catalog.get(name)
+        if item is None:
+            self._report_unknown_item(name)
+            return
 
         # Validate quantity
         try:
@@ -274,62 +2421,104 @@ class OrderManager:
             if quantity < 1:
                 raise ValueError
         except:
-            prompt = input("Enter a valid quantity (1 or more): ")
+            prompt = ask("Enter a valid quantity (1 or more): ")
             if not prompt.isdigit() or int(prompt) < 1:
-                cprint("invalid quantity", "red")
+                print_error("invalid quantity")
                 return
             quantity = int(prompt)
 
         # check for maximum quantity
         if quantity > 10:
-            cprint("maximum quantity is 10 at a time. try adding items again to add more.", "red")
+            print_error("maximum quantity is 10 at a time. try adding items again to add more.")
             return
 
-        for _ in range(quantity):
-            self._add_order_item(item)
+        self._add_order_item(item, quantity)
 
-    def _add_order_item(self, item: OrderItem):
-        """Helper to append a single OrderItem to the current order."""
+    @instrumented("order item add")
+    def _add_order_item(self, item: OrderItem, quantity: int = 1) -> bool:
+        """Helper to add `quantity` units of an OrderItem to the current order; return whether it was added."""
         self._check_current_order()
 
         order = self._get_order_by_uuid(self.current_order_uuid)
         if order is None:
-            cprint("order not found.", "red")
-            return
+            print_error("order not found.")
+            return False
+
+        # journal under the order's lock so its events are logged in the order they were applied
+        with self._changes.shared(), order.lock:
+            try:
+                order.add_item(item, quantity)
+            except ValueError as error:
+                print_error(str(error))
+                return False
+            self._record(("add", order.uuid, item.name, quantity, repr(item.price)))
+        cprint(f"added {quantity}x {item.name} to order {order.uuid}", "green")
+        return True
+
 
-        order.items.append(item)
-        cprint(f"added {item.name} to order {order.uuid}", "green")
+    def _report_unknown_item(self, name: str):
+        """Report a name that isn't on the menu, suggesting the closest matches."""
+        suggestions = self.catalog.complete(name, limit=3) or self.catalog.suggest(name)
+        if suggestions:
+            print_error(f"invalid menu item; did you mean {' or '.join(item.name for item in suggestions)}?")
+        else:
+            print_error("invalid menu item")
 
+    @staticmethod
+    def _remove_named_item(order: Order, name: str, quantity: int) -> int:
+        """Remove up to `quantity` units named `name`, newest line first, and return how many were removed.
+
+        Matching by name covers lines holding an item from before a menu reload.
+        """
+        with order.lock:
+            removed = 0
+            for item in reversed([item for item in order.items if item.name == name]):
+                removed += order.remove_item(item, quantity - removed)
+                if removed == quantity:
+                    break
+            return removed
 
     def remove_order_item(self):
         """Interactively remove a given quantity of a menu item from the current order."""
-        prompt = input("which menu item would you like to remove?: ")
+        prompt = ask("which menu item would you like to remove?: ")
         prompt = prompt.strip().lower()
 
-        item = next((item for item in menu if item.name.lower() == prompt), None)
+        item = self.catalog.get(prompt)
         if item is None:
-            cprint("invalid menu item", "red")
+            self._report_unknown_item(prompt)
             return
         
-        prompt = input("how many of this item would you like to remove? ")
+        prompt = ask("how many of this item would you like to remove? ")
         if not prompt.isdigit() or int(prompt) < 1:
-            cprint("invalid quantity", "red")
+            print_error("invalid quantity")
             return
         quantity = int(prompt)
 
-        for _ in range(quantity):
-            self._remove_order_item(item)
+        self._remove_order_item(item, quantity)
 
-    def _remove_order_item(self, item: OrderItem):
-        """Helper to remove a single OrderItem from the current order."""
+    @instrumented("order item remove")
+    def _remove_order_item(self, item: OrderItem, quantity: int = 1) -> int:
+        """Helper to remove up to `quantity` units of an OrderItem from the current order; return how many were."""
         self._check_current_order()
 
         order = self._get_order_by_uuid(self.current_order_uuid)
-        if item in order.items:
-            order.items.remove(item)
-            cprint(f"removed {item.name} from order {order.uuid}", "green")
-        else:
-            cprint(f"{item.name} not in current order.", "red")
+        if order is None:
+            print_error("order not found.")
+            return 0
+
+        with self._changes.shared(), order.lock:
+            try:
+                removed = self._remove_named_item(order, item.name, quantity)
+            except ValueError as error:
+                print_error(str(error))
+                return 0
+            if removed:
+                self._record(("remove_item", order.uuid, item.name, removed))
+        if removed:
+            cprint(f"removed {removed}x {item.name} from order {order.uuid}", "green")
+        if removed < quantity:
+            print_error(f"{item.name} not in current order{' (no more left)' if removed else ''}.")
+        return removed
 
 
     # Process orders
@@ -339,132 +2528,521 @@ class OrderManager:
 
         order = self._get_order_by_uuid(self.current_order_uuid)
         if order is None:
-            cprint("order not found.", "red")
+            print_error("order not found.")
             return
 
         if order.paid:
-            cprint("order already paid.", "red")
+            print_error("order already paid.")
             return
 
-        extras = []
-        # constants so i can be lazy and hardcode it
-        if order.is_discounted:
-            extras.append(f"a 10% discount")
-        if order.service_type is ServiceType.DELIVERY:
-            extras.append(f"$8.00 delivery")
-
-        extras.append(f"10% GST")
-
-        # smoothly concatenate the extras!
-        extras_str = f", including {' and '.join(extras)}" if extras else ""
-        print(f"the total for order {order.uuid} is ${order.total_cost:.2f}{extras_str}.")
-        prompt = input(f"would you like to pay now? (y/N): ")
+        # itemise straight from the quote, so the breakdown always matches what gets charged
+        quote = order.quote
+        with Renderer() as renderer:
+            renderer.line(f"subtotal: {format_cents(quote.subtotal_cents)}")
+            for rule, delta in quote.adjustments:
+                renderer.line(f"{rule.label}: {'-' if delta < 0 else '+'}{format_cents(abs(delta))}")
+            renderer.line(f"the total for order {order.uuid} is {format_cents(quote.total_cents)}.")
+        prompt = ask(f"would you like to pay now? (y/N): ")
         if parse_boolean_input(prompt, handle_invalid=True):
-            order.paid = True
+            # another terminal may have settled it while we were waiting for an answer
+            try:
+                record = self._pay_order(order)
+            except KitchenFull as full:
+                print_error(f"the kitchen is full ({full.args[0]} orders waiting), so payment wasn't taken; try again once it catches up.")
+                return
+            if record is None:
+                print_error("order already paid.")
+                return
             cprint(f"order {order.uuid} paid successfully!", "green")
-            # Update daily sales
-            self.daily_sales[order.uuid] = order.total_cost
             cprint(f"order {order.uuid} has been added to the daily sales summary.", "green")
         else:
             cprint("payment cancelled", "yellow")
 
 
+    def process_all_orders(self, type: str | None = None):
+        """Price every unpaid order (optionally of one service type) at once and settle them in one step."""
+        service_type = None
+        if type is not None:
+            try:
+                service_type = ServiceType[type.upper()]
+            except KeyError:
+                print_error("invalid service type!")
+                return
+
+        orders = [
+            order for order in self.orders.unpaid()
+            if service_type is None or order.service_type is service_type
+        ]
+        if not orders:
+            cprint("no unpaid orders to process.", "yellow")
+            return
+
+        adjustments: dict[PricingRule, int] = {}
+        total = sum(PRICING.total_batch(orders, adjustments))
+
+        # itemised from the rules that applied, like a single order's breakdown
+        with Renderer() as renderer:
+            for current_type in ServiceType:
+                count = sum(order.service_type is current_type for order in orders)
+                if count:
+                    renderer.line(f"{count} {current_type.name.lower()} order(s)")
+            renderer.line(f"subtotal: {format_cents(sum(order.raw_cents for order in orders))}")
+            for rule, delta in adjustments.items():
+                renderer.line(f"{rule.label}: {'-' if delta < 0 else '+'}{format_cents(abs(delta))}")
+            renderer.line(f"the total for {len(orders)} unpaid order(s) is {format_cents(total)}.")
+
+        prompt = ask(f"would you like to settle all {len(orders)} order(s) now? (y/N): ")
+        if parse_boolean_input(prompt, handle_invalid=True):
+            paid = 0
+            for index, order in enumerate(orders):
+                # charge the order's current total, in case it changed (or was paid) since pricing
+                try:
+                    paid += self._pay_order(order) is not None
+                except KitchenFull:
+                    print_error(f"the kitchen is full, so the last {len(orders) - index} order(s) weren't paid; try again once it catches up.")
+                    break
+            cprint(f"{paid} order(s) paid and added to the daily sales summary.", "green")
+        else:
+            cprint("payment cancelled", "yellow")
+
+    @instrumented("order pay")
+    def _pay_order(self, order: Order) -> tuple | None:
+        """Charge an order, queue it for the kitchen, add it to the daily sales and journal it.
+
+        Returns its journal record, or None if it was already paid. Raises KitchenFull, without
+        charging, if the kitchen has no room for it.
+        """
+        with self._changes.shared(), order.lock:
+            if order.paid:
+                return None
+            # queue it first, so a full kitchen turns the payment away rather than losing the order
+            now = time.time()
+            self.kitchen.offer(order, now)
+            total_cents = order.pay()
+            # Update daily sales
+            timestamp = self.daily_sales.record(order, total_cents, now)
+            # journaled before the lock is released, since the kitchen can start it from here on
+            record = ("pay", order.uuid, str(total_cents), repr(timestamp))
+            self._record(record)
+        self.orders.settled(order)
+        return record
+
+    @instrumented("order sales")
+    def list_sales(self):
+        """Print each paid order’s total, in the order they were paid."""
+        if not self.daily_sales:
+            cprint("no sales to list :(", "red")
+            return
+
+        with Renderer(chunk_lines=4096) as renderer:
+            for order_uuid, total_cents in self.daily_sales.items():
+                renderer.line(f"order {order_uuid}: {renderer.paint(format_cents(total_cents), "green")}")
+
     # Generate daily sales summary
-    def generate_daily_sales_summary(self):
-        """Print each paid order’s total and the grand total sales for the day."""
+    @instrumented("order summary")
+    def generate_daily_sales_summary(self, window: str | None = None):
+        """Print aggregate sales for the day, or for a recent window such as '30m' or '2h'."""
         if not self.daily_sales:
             cprint("no sales to summarise :(", "red")
             return
 
-        for order_uuid, total_cost in self.daily_sales.items():
-            print(f"order {order_uuid}: {colored(f"${total_cost:.2f}", "green")}")
+        summary = self._sales_summary(window)
+        if summary is not None:
+            print_sales_summary(summary, "today" if window is None else f"the last {window}")
+
+    def print_sales_summary_data(self, window: str | None = None):
+        """Print the day's (or a recent window's) sales aggregates as one line of JSON, for merging with others."""
+        summary = self._sales_summary(window)
+        if summary is not None:
+            print(json.dumps(summary.as_dict()))
+
+    def _sales_summary(self, window: str | None) -> SalesSummary | None:
+        """Return the sales aggregates for the day or a window like '30m', or None (after saying so) if it's invalid."""
+        if window is None:
+            return self.daily_sales.summary()
+        seconds = parse_duration(window)
+        if seconds is None:
+            print_error("invalid time window; try something like 30m or 2h.")
+            return None
+        return self.daily_sales.summary(start=time.time() - seconds)
+
+    def show_kitchen(self):
+        """Print the orders being prepared, then those waiting, most urgent first."""
+        in_progress = self.kitchen.in_progress()
+        waiting = self.kitchen.waiting()
+        if not in_progress and not waiting:
+            cprint("the kitchen is clear :)", "green")
+            return
+
+        now = time.time()
+        with Renderer() as renderer:
+            for heading, tickets in (("in progress", in_progress), ("waiting", waiting)):
+                renderer.line(f"{heading} ({len(tickets)}):", "green", attrs=["bold"])
+                for ticket in tickets:
+                    ready_by = time.strftime("%H:%M", time.localtime(ticket.ready_by))
+                    late = renderer.paint(" (late)", "red") if ticket.ready_by < now else ""
+                    renderer.line("\t" + f"{ticket.service_type.name.lower()} order {ticket.order_uuid}, ready by {ready_by}{late}")
+            if self.kitchen.capacity is not None:
+                renderer.line(f"{len(waiting)}/{self.kitchen.capacity} waiting places taken.")
+
+    def print_kitchen_data(self):
+        """Print the tickets in progress and waiting, in the order `kitchen` lists them, as one line of JSON."""
+        print(json.dumps({
+            "in_progress": [ticket.as_dict() for ticket in self.kitchen.in_progress()],
+            "waiting": [ticket.as_dict() for ticket in self.kitchen.waiting()],
+        }))
+
+    @instrumented("kitchen next")
+    def start_next_kitchen_order(self):
+        """Start preparing the most urgent waiting order."""
+        with self._changes.shared():
+            ticket = self.kitchen.start()
+            if ticket is None:
+                cprint("no orders waiting for the kitchen.", "yellow")
+                return
+            order = self.orders.get(ticket.order_uuid)
+            self._record_kitchen(order, ("start", ticket.order_uuid, repr(ticket.started_at)))
+
+        items = ", ".join(f"{line.quantity}x {line.item.name}" for line in order.items.values()) if order is not None else "unknown items"
+        ready_by = time.strftime("%H:%M", time.localtime(ticket.ready_by))
+        cprint(f"start {ticket.service_type.name.lower()} order {ticket.order_uuid}: {items or 'no items'}, ready by {ready_by}.", "green")
+
+    @instrumented("kitchen done")
+    def complete_kitchen_order(self, order: str | None = None):
+        """Mark an order finished: the given one (by uuid or its first few characters), or the one started longest ago."""
+        order_uuid = None
+        if order is not None:
+            matches = [ticket.order_uuid for ticket in self.kitchen.in_progress() if str(ticket.order_uuid).startswith(order.lower())]
+            if len(matches) != 1:
+                print_error(f"no order in progress matches '{order}'." if not matches else f"'{order}' matches {len(matches)} orders in progress; give more of it.")
+                return
+            order_uuid = matches[0]
 
-        total_sales = sum(self.daily_sales.values())
-        cprint(f"total sales for today: ${total_sales:.2f}", "green")
+        with self._changes.shared():
+            ticket = self.kitchen.complete(order_uuid)
+            if ticket is None:
+                cprint("no orders in progress.", "yellow")
+                return
+            self._record_kitchen(self.orders.get(ticket.order_uuid), ("done", ticket.order_uuid))
+        minutes = (time.time() - ticket.paid_at) / 60
+        cprint(f"order {ticket.order_uuid} is ready for {ticket.service_type.name.lower()}, {minutes:.0f} minute(s) after payment.", "green")
+
+    def _record_kitchen(self, order: Order | None, record: tuple):
+        """Journal a kitchen event after the order's payment, which is journaled under its lock once it's queued."""
+        with order.lock if order is not None else contextlib.nullcontext():
+            self._record(record)
+
+    def import_orders(self, path: str):
+        """Import orders from a CSV or JSONL file, skipping any whose external id was imported before."""
+        importer = OrderImport(self.catalog, self.imported)
+        try:
+            # like a snapshot load, an import only adds to the heap, so don't have the collector rescan it
+            with gc_paused(), open(path, encoding="utf-8", newline="") as file:
+                for batch in importer.batches(file):
+                    self._import_batch(importer, batch)
+        except OSError as error:
+            print_error(f"couldn't read orders from {path}: {(error.strerror or str(error)).lower()}.")
+            if not importer.added:
+                return
+        except (UnicodeDecodeError, csv.Error) as error:
+            # the batches before the bad line are already in
+            print_error(f"couldn't read orders from {path}: {error}.")
+
+        cprint(f"{importer.added} order(s) imported from {path}, worth {format_cents(importer.total_cents)}", "green" if importer.added else "yellow")
+        if importer.skipped:
+            cprint(f"{importer.skipped} order(s) skipped, as they were imported before", "yellow")
+        if importer.rejected:
+            print_error(f"{importer.rejected} order(s) rejected:")
+            for line, reason in importer.rejects:
+                cprint(f"\tline {line}: {reason}", "red")
+            if importer.rejected > len(importer.rejects):
+                cprint(f"\t...and {importer.rejected - len(importer.rejects)} more", "red")
+
+    @instrumented("order import batch")
+    def _import_batch(self, importer: OrderImport, batch: Iterable[tuple[str, Order]]):
+        """Add a batch of imported orders to the store and journal, skipping ids imported meanwhile."""
+        orders = {}
+        records = []
+        # held across the check and the insert, so concurrent imports of the same file add each order once
+        with self._changes.shared(), self._import_lock:
+            for external_id, order in batch:
+                if external_id in self.imported or external_id in orders:
+                    importer.skipped += 1
+                    continue
+                orders[external_id] = order
+            # the store gives them their uuids
+            self.orders.extend(orders.values(), new=True)
+            for external_id, order in orders.items():
+                self.imported[external_id] = order.uuid
+                records.append(("create", order.uuid, order.service_type.name, int(order.has_loyalty_card), external_id))
+                records.extend(("add", order.uuid, item.name, line.quantity, repr(item.price)) for item, line in order.items.items())
+            self._record(*records)
+        importer.added += len(orders)
+        importer.total_cents += sum(order.total_cents for order in orders.values())
+
+    def save_snapshot(self, path: str):
+        """Save every order, sale and kitchen ticket to a binary snapshot at `path`, for a fast restart with --snapshot."""
+        try:
+            # keep other sessions from changing anything mid-save, so orders, sales and the kitchen agree
+            with self._changes.exclusive():
+                order_count, sale_count = Snapshot.save(self, path)
+        except OSError as error:
+            print_error(f"couldn't write a snapshot to {path}: {error.strerror.lower()}.")
+            return
+        cprint(f"{order_count} order(s) and {sale_count} sale(s) saved to {path}", "green")
 
-        cprint("thank you for using papa-pizza!", "green")
+    def export_sales(self, path: str):
+        """Write the day's sales to `path` for offline reporting with --report, replacing it atomically."""
+        try:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+                count = self.daily_sales.export(file)
+            os.replace(f"{path}.tmp", path)
+        except OSError as error:
+            print_error(f"couldn't write sales to {path}: {error.strerror.lower()}.")
+            return
+        cprint(f"{count} sale(s) exported to {path}", "green")
+
+    def metric_gauges(self) -> dict[str, tuple[str, float]]:
+        """Return the current order gauges as {name: (help, value)}, for stats and metrics export."""
+        open_orders, open_items = self.orders.unpaid_counts()
+        return {
+            "orders": ("orders in the store", len(self.orders)),
+            "hot_orders": ("orders held in full rather than archived", self.orders.hot_count),
+            "open_orders": ("orders not yet paid", open_orders),
+            "open_order_items": ("units across unpaid orders", open_items),
+            "items_per_open_order": ("average units per unpaid order", open_items / open_orders if open_orders else 0.0),
+            "paid_orders": ("orders paid today", len(self.daily_sales)),
+            "sales_cents": ("total sales today, in cents", self.daily_sales.total),
+            "kitchen_waiting": ("paid orders waiting for the kitchen", len(self.kitchen)),
+            "kitchen_in_progress": ("orders being prepared", len(self.kitchen.in_progress())),
+        }
 
 def parse_boolean_input(prompt: str, handle_invalid: bool = False) -> bool:
     """Parse 'y/n' input, returning True for yes. Invalid only retried if handle_invalid=True."""
     if prompt.lower() in ["y", "yes"]:
         return True
-    elif prompt.lower() in ["n", "no"] or not handle_invalid:
+    elif prompt.lower() in ["n", "no", ""] or not handle_invalid:
         return False
     else:
-        cprint("invalid input, please try again.", "red")
+        print_error("invalid input, please try again.")
+        return False
+
+class Session:
+    """Interactive session: prompts are answered at the terminal and errors are only printed."""
+    # where this session's output goes while `SessionStdout` is installed; None means the real stdout
+    output: TextIO | None = None
+
+    def ask(self, message: str) -> str:
+        return input(message)
+
+    def report_error(self, message: str):
+        pass
+
+class ScriptSession(Session):
+    """Non-interactive session answering prompts from queued script answers or a default."""
+    def __init__(self, default_answer: str | None = None):
+        self.answers: deque[str] = deque()
+        self.default_answer = default_answer
+        self.errors: list[str] = []
+
+    def ask(self, message: str) -> str:
+        if self.answers:
+            return self.answers.popleft()
+        if self.default_answer is not None:
+            return self.default_answer
+
+        print_error(f"no answer provided for prompt '{message.strip()}'")
+        return ""
+
+    def report_error(self, message: str):
+        self.errors.append(message)
+
+class NetworkSession(Session):
+    """Session for one TCP client, driven from a worker thread while the event loop owns the socket.
+
+    Output and prompts are handed to the loop thread-safely. A prompt holds its worker thread
+    until answered, so one left unanswered for `prompt_timeout` seconds ends the session.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 prompt_timeout: float | None = None):
+        self.loop = loop
+        self.reader = reader
+        self.writer = writer
+        self.prompt_timeout = prompt_timeout
+        self.output = self
+        self.errors = 0
+
+    def write(self, text: str) -> int:
+        self.loop.call_soon_threadsafe(self.writer.write, text.encode("utf-8"))
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
         return False
+
+    def ask(self, message: str) -> str:
+        self.write(f"? {message.strip()}\n")
+        answer = asyncio.run_coroutine_threadsafe(self.reader.readline(), self.loop)
+        try:
+            line = answer.result(self.prompt_timeout)
+        except TimeoutError:
+            answer.cancel()
+            self.write("no answer in time, closing the session.\n")
+            raise EOFError
+
+        # like input(), give up on the command if the client hangs up mid-prompt
+        if not line:
+            raise EOFError
+        return line.decode("utf-8").strip()
+
+    def report_error(self, message: str):
+        self.errors += 1
+
+class SessionStdout:
+    """Stand-in for sys.stdout that routes writes to the current session's output."""
+    def __init__(self, fallback: TextIO):
+        self.fallback = fallback
+
+    def _target(self) -> TextIO:
+        return current_session.get().output or self.fallback
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+# the session commands are currently running under; a context variable so each caller can bring its own
+current_session: ContextVar[Session] = ContextVar("current_session", default=Session())
+
+def ask(message: str) -> str:
+    """Prompt for input through the current session."""
+    return current_session.get().ask(message)
+
+def print_error(message: str):
+    """Print an error in red and report it to the current session."""
+    current_session.get().report_error(message)
+    cprint(message, "red")
+
 class Command:
     """Bind a CLI command name to a function and its description."""
     def __init__(self, name: str, function: Callable, description: str):
         self.name = name
+        self.tokens = tuple(name.split())
         self.__function__ = function
         self.description = description
 
-    def execute(self, tokens: list[str], required_count=None):
-        """Validate argument count then invoke the bound function."""
-        signature = inspect.signature(self.__function__)
-        params = list(signature.parameters.values())
-
-        #
-        required_param_count = sum(
-            param.default == inspect.Parameter.empty and param.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.POSITIONAL_ONLY)
-            for param in params
+        # read the signature once here rather than on every call, straight off the code
+        # object: importing inspect to do it would cost more than the rest of start-up
+        target = getattr(function, "__func__", function)
+        while hasattr(target, "__wrapped__"):
+            target = target.__wrapped__
+        code = target.__code__
+        names = code.co_varnames[:code.co_argcount]
+        defaults = target.__defaults__ or ()
+        if hasattr(function, "__self__"):
+            # a bound method: `self` is already supplied
+            names = names[1:]
+
+        self.max_arg_count = len(names)
+        self.required_arg_count = len(names) - len(defaults)
+        self.usage = " ".join(
+            [f"<{name}>" for name in names[:self.required_arg_count]]
+            + [f"<{name} {default if default is not None else '(optional)'}>" for name, default in zip(names[self.required_arg_count:], defaults)]
         )
 
-        # Validate token count
-        if not required_param_count <= len(tokens) <= len(params):
-            cprint(f"invalid number of arguments for command '{self.name}' — (expected {required_count}-{len(params)}, got {len(tokens)})", "red")
+    def execute(self, tokens: list[str]):
+        """Validate argument count then invoke the bound function."""
+        if not self.required_arg_count <= len(tokens) <= self.max_arg_count:
+            print_error(f"invalid number of arguments for command '{self.name}' — (expected {self.required_arg_count}-{self.max_arg_count}, got {len(tokens)})")
             return None
 
-        return self.__function__(*tokens)
+        if not METRICS.enabled:
+            return self.__function__(*tokens)
+
+        started = time.perf_counter()
+        try:
+            return self.__function__(*tokens)
+        finally:
+            METRICS.observe("command", self.name, time.perf_counter() - started)
+
+class CommandTrieNode:
+    """Node in the token trie used for command dispatch."""
+    __slots__ = ("children", "command")
+
+    def __init__(self):
+        self.children: dict[str, CommandTrieNode] = {}
+        self.command: Command | None = None
 
 class CommandParser:
     """Parse user input, map to commands, and run them in a REPL."""
     def __init__(self):
+        self.commands: list[Command] = []
+        # commands are found by walking their name tokens, so dispatch cost depends on the input, not the command count
+        self._trie = CommandTrieNode()
+
         # Register basic commands
-        self.commands = [
+        self.register(
             Command("help", self.show_help, "Display this help message."),
             Command("h", self.show_help, "Alias for 'help'."),
             Command("quit", self.quit, "Exit the program."),
             Command("exit", lambda: cprint("use quit to exit", "yellow"), "Alias for 'quit'."),
-        ]
+        )
+
+    def register(self, *commands: Command):
+        """Add commands to the dispatch trie; a later command with the same name replaces the earlier one."""
+        for command in commands:
+            node = self._trie
+            for token in command.tokens:
+                node = node.children.setdefault(token, CommandTrieNode())
+
+            if node.command is not None:
+                self.commands.remove(node.command)
+            node.command = command
+            self.commands.append(command)
+
+    def match(self, tokens: list[str]) -> tuple[Command | None, list[str]]:
+        """Return the longest registered command prefixing `tokens`, and the remaining arguments."""
+        node = self._trie
+        command, arg_start = None, 0
+        for depth, token in enumerate(tokens, start=1):
+            node = node.children.get(token)
+            if node is None:
+                break
+            if node.command is not None:
+                command, arg_start = node.command, depth
+
+        return command, tokens[arg_start:]
 
     def parse_and_execute(self, input_str):
         """Match the input string to a registered command and execute."""
-        tokens = input_str.strip().split()
-        
-        for command in self.commands:
-            name_parts = command.name.split()
-            # if the command name matches the input, omit the matching indexes
-            if tokens[:len(name_parts)] == name_parts:
-                args = tokens[len(name_parts):]
-                return command.execute(args)
-        
-        cprint("unknown command. type 'help'.", "red")
-        return None
+        command, args = self.match(input_str.split())
+        if command is None:
+            print_error("unknown command. type 'help'.")
+            return None
+
+        return command.execute(args)
 
     def show_help(self):
         """Display help with all available command names and descriptions."""
         cprint("available commands:", "green", attrs=["bold"])
+        width = max(len(cmd.name) for cmd in self.commands) + 50
         for cmd in self.commands:
-            signature = inspect.signature(cmd.__function__)
-
-            # format params
-            params = " ".join(
-                f"<{param} {value.default if value.default is not None else '(optional)'}>"
-                for param, value in signature.parameters.items()
-            )
-
             # concatenate command name and params
-            cmd_with_params = f"{colored(cmd.name, 'blue')} {colored(params, 'cyan')}"
+            cmd_with_params = f"{colored(cmd.name, 'blue')} {colored(cmd.usage, 'cyan')}"
 
-            print(f"{cmd_with_params.ljust(max(len(cmd.name) for cmd in self.commands) + 50)}  {cmd.description}")
+            print(f"{cmd_with_params.ljust(width)}  {cmd.description}")
 
     # Exit the program
     @staticmethod
     def quit():
         """Prompt for confirmation and exit the application on yes."""
-        prompt = input(colored("are you sure you want to quit? (y/N): ", "yellow"))
+        prompt = ask(colored("are you sure you want to quit? (y/N): ", "yellow"))
         if parse_boolean_input(prompt, handle_invalid=False):
             cprint("okay, see ya!", "green")
             sys.exit(0)
@@ -472,6 +3050,36 @@ class CommandParser:
             cprint("okay, continuing...", "green")
             return
 
+    def run_script(self, lines: Iterable[str], session: ScriptSession, on_result: Callable | None = None) -> int:
+        """Execute script lines under `session` without blocking on input; return the failed command count."""
+        failures = 0
+        token = current_session.set(session)
+        try:
+            for line_number, command, answers in parse_script(lines):
+                session.answers.extend(answers)
+                session.errors.clear()
+
+                quitting = False
+                try:
+                    self.parse_and_execute(command)
+                except SystemExit:
+                    # `quit` was confirmed; stop replaying but still report this command
+                    quitting = True
+
+                if session.answers:
+                    print_error(f"{len(session.answers)} unused answer(s) for '{command}'")
+                    session.answers.clear()
+
+                failures += bool(session.errors)
+                if on_result is not None:
+                    on_result(line_number, command, list(session.errors))
+                if quitting:
+                    break
+        finally:
+            current_session.reset(token)
+
+        return failures
+
     # User input menu
     def start_repl(self):
         """Begin the interactive prompt loop until quit."""
@@ -480,26 +3088,79 @@ class CommandParser:
             if user_input:
                 self.parse_and_execute(user_input)
 
-class Application:
-    """Wire together CLI commands with the OrderManager and start the REPL."""
-    def __init__(self, *args):
-        self.order_manager = OrderManager()
+def parse_script(lines: Iterable[str]):
+    """Group script lines into (line number, command, answers) tuples.
 
-        parser = CommandParser()
-        parser.commands.append(Command("menu", self.show_menu, "Show the menu"))
+    Blank lines and lines starting with '#' are ignored. Lines starting with '?' answer,
+    in order, the prompts raised by the command above them.
+    """
+    pending = None
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
 
-        parser.commands.append(Command("order create", self.order_manager.create_order, "Add an order"))
-        parser.commands.append(Command("order remove", self.order_manager.remove_order, "Remove an order"))
-        parser.commands.append(Command("order list", self.order_manager.list_orders, "List all orders"))
-        parser.commands.append(Command("order process", self.order_manager.process_order, "Process an order"))
-        # parser.commands.append(Command("order process all", self.order_manager.process_all_orders, "Process all available orders"))
-        parser.commands.append(Command("order switch", self.order_manager.switch_order, "Switch to a different order"))
+        # an answer with no command before it falls through as a (failing) command of its own
+        if line.startswith("?") and pending is not None:
+            pending[2].append(line[1:].strip())
+            continue
 
-        parser.commands.append(Command("order item add", self.order_manager.add_order_item, "Add an item to the current order"))
-        parser.commands.append(Command("order item remove", self.order_manager.remove_order_item, "Remove an item from the current order"))
+        if pending is not None:
+            yield pending
+        pending = (line_number, line, [])
 
-        parser.commands.append(Command("order summary", self.order_manager.generate_daily_sales_summary, "Generate daily sales summary"))
+    if pending is not None:
+        yield pending
 
+class Application:
+    """Wire together CLI commands with the OrderManager and run them from a REPL or a script."""
+    def __init__(self, journal_path: str | None = None, order_manager: OrderManager | None = None, menu_path: str | None = None,
+                 snapshot_path: str | None = None):
+        self.order_manager = order_manager or OrderManager(catalog=MenuCatalog(menu, menu_path) if menu_path else None)
+        self.replayed_events = 0
+        self.skipped_events = 0
+        self.restored_orders = 0
+        if snapshot_path is not None and order_manager is None:
+            self.restored_orders, _ = Snapshot.load(self.order_manager, snapshot_path)
+        if journal_path is not None and order_manager is None:
+            # restore the session from the journal before recording anything new to it
+            self.replayed_events, self.skipped_events = self.order_manager.replay(Journal.read(journal_path))
+            self.order_manager.journal = Journal(journal_path)
+
+        self.parser = parser = CommandParser()
+        parser.register(Command("menu", self.show_menu, "Show the menu"))
+        parser.register(Command("menu find", self.find_menu_items, "Find menu items by name, prefix or near-miss spelling"))
+        parser.register(Command("menu reload", self.reload_menu, "Reload the menu file"))
+
+        parser.register(Command("order create", self.order_manager.create_order, "Add an order"))
+        parser.register(Command("order remove", self.order_manager.remove_order, "Remove an order"))
+        parser.register(Command("order list", self.order_manager.list_orders, "List all orders, or a page of 50"))
+        parser.register(Command("order latest", self.order_manager.list_latest_orders, "List the most recently created orders (10 unless given)"))
+        parser.register(Command("order between", self.order_manager.list_orders_between, "List orders created between two times today (e.g. 18:00 19:00, or 6pm 7pm)"))
+        parser.register(Command("order process", self.order_manager.process_order, "Process an order"))
+        parser.register(Command("order process all", self.order_manager.process_all_orders, "Process all available orders"))
+        parser.register(Command("order switch", self.order_manager.switch_order, "Switch to a different order"))
+
+        parser.register(Command("order item add", self.order_manager.add_order_item, "Add an item to the current order"))
+        parser.register(Command("order item remove", self.order_manager.remove_order_item, "Remove an item from the current order"))
+
+        parser.register(Command("order summary", self.order_manager.generate_daily_sales_summary, "Generate daily sales summary, optionally for a recent window (e.g. 30m, 2h)"))
+        parser.register(Command("order summary json", self.order_manager.print_sales_summary_data, "Print the daily sales summary's totals as JSON, optionally for a recent window"))
+        parser.register(Command("order sales", self.order_manager.list_sales, "List every paid order and its total"))
+        parser.register(Command("order import", self.order_manager.import_orders, "Import orders from a CSV or JSONL file, skipping any imported before"))
+        parser.register(Command("order sales export", self.order_manager.export_sales, "Export the day's sales to a file for --report"))
+        parser.register(Command("kitchen", self.order_manager.show_kitchen, "Show orders being prepared and waiting for the kitchen"))
+        parser.register(Command("kitchen json", self.order_manager.print_kitchen_data, "Print the kitchen's tickets as JSON"))
+        parser.register(Command("kitchen next", self.order_manager.start_next_kitchen_order, "Start preparing the most urgent paid order"))
+        parser.register(Command("kitchen done", self.order_manager.complete_kitchen_order, "Mark an order in progress (or the oldest) ready"))
+        parser.register(Command("snapshot", self.order_manager.save_snapshot, "Save all orders, sales and the kitchen queue to a snapshot file for --snapshot"))
+
+        parser.register(Command("stats", self.show_stats, "Show order counts and per-command latencies"))
+        parser.register(Command("stats reset", self.reset_stats, "Clear the recorded latencies"))
+        parser.register(Command("stats export", self.export_stats, "Write metrics in Prometheus text format to a file"))
+
+    def start(self, *args):
+        """Print the banner, run an optional command from argv, then start the REPL."""
         cprint("""
 welcome to papa-pizza 🍕,
 your local pizza store's ordering backend!
@@ -511,33 +3172,624 @@ by vapidinfinity, aka esi
 for more information, type 'help' or 'h' at any time.
 to exit the program, type 'quit' or 'exit'.""")
 
+        if self.replayed_events:
+            cprint(f"restored {self.replayed_events} event(s) from the journal.", "green")
+        if self.skipped_events:
+            cprint(f"skipped {self.skipped_events} malformed event(s) in the journal.", "yellow")
+        if self.restored_orders:
+            cprint(f"restored {self.restored_orders} order(s) from the snapshot.", "green")
+
         if args:
-            parser.parse_and_execute(" ".join(args))
+            self.parser.parse_and_execute(" ".join(args))
+
+        self.parser.start_repl()
+
+    def run_script(self, lines: Iterable[str], default_answer: str | None = None, output: str = "text") -> int:
+        """Replay a script without a REPL, returning a process exit code (1 if any command failed).
+
+        `output` is "text" for the usual output, "json" for one JSON result per command,
+        or "quiet" to suppress everything but errors, which go to stderr.
+        """
+        stdout = sys.stdout
+
+        def report(line_number: int, command: str, errors: list[str]):
+            if output == "json":
+                stdout.write(json.dumps({"line": line_number, "command": command, "ok": not errors, "errors": errors}) + "\n")
+            elif output == "quiet":
+                for error in errors:
+                    print(f"line {line_number}: {error}", file=sys.stderr)
+
+        with contextlib.ExitStack() as stack:
+            if output != "text":
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            failures = self.parser.run_script(lines, ScriptSession(default_answer), report)
 
-        parser.start_repl()
+        return 1 if failures else 0
 
     # Show menu
-    @staticmethod
-    def show_menu():
+    def show_menu(self):
         """Print Papa Pizza’s menu of available items."""
-        cprint("papa-pizza's famous menu", None, attrs=["bold"])
+        with Renderer() as renderer:
+            renderer.line("papa-pizza's famous menu", None, attrs=["bold"])
+
+            current_category = None
+            for item in self.order_manager.catalog:
+                if item.category != current_category:
+                    current_category = item.category
+                    renderer.line(f"\n{current_category}:", "green", attrs=["bold"])
+
+                renderer.line(f"{item.name}: ${item.price:.2f}", "green")
+
+    def find_menu_items(self, text: str):
+        """List menu items starting with `text`, or failing that, close misspellings of it."""
+        catalog = self.order_manager.catalog
+        items = catalog.complete(text) or catalog.suggest(text)
+        if not items:
+            cprint(f"nothing on the menu looks like '{text}'.", "yellow")
+            return
 
-        current_item = None
-        for item in menu:
-            if type(item) is not type(current_item):
-                current_item = item
-                cprint(f"\n{type(item).__name__}:", "green", attrs=["bold"])
-                
-            cprint(f"{item.name}: ${item.price:.2f}", "green")
+        with Renderer() as renderer:
+            for item in items:
+                renderer.line(f"{item.name}: ${item.price:.2f}", "green")
+
+    def reload_menu(self):
+        """Reload the menu file now rather than waiting for a change to be noticed."""
+        catalog = self.order_manager.catalog
+        if catalog.path is None:
+            print_error("the menu wasn't loaded from a file; start with --menu FILE.")
+        elif catalog.reload():
+            cprint(f"menu reloaded from {catalog.path}", "green")
             
+    def prometheus_metrics(self) -> str:
+        """Return latencies and order gauges in Prometheus text format."""
+        return METRICS.prometheus(self.order_manager.metric_gauges())
+
+    def show_stats(self):
+        """Print order gauges and, if metrics are on, call counts and latency percentiles."""
+        gauges = self.order_manager.metric_gauges()
+        with Renderer() as renderer:
+            renderer.line(f"orders: {gauges['orders'][1]} ({gauges['open_orders'][1]} open, {gauges['items_per_open_order'][1]:.2f} items per open order)")
+            renderer.line(f"paid today: {gauges['paid_orders'][1]} ({format_cents(gauges['sales_cents'][1])})")
+
+            if not METRICS.enabled:
+                renderer.line("latency metrics are off; start with --metrics to record them.", "yellow")
+                return
+
+            for kind, histograms in METRICS.histograms.items():
+                if not histograms:
+                    continue
+                renderer.line(f"\n{kind:<24}{'calls':>8}{'p50':>10}{'p95':>10}{'p99':>10}", None, attrs=["bold"])
+                for name, histogram in sorted(histograms.items()):
+                    percentiles = "".join(f"{histogram.percentile(fraction) * 1000:>8.3f}ms" for fraction in (0.5, 0.95, 0.99))
+                    renderer.line(f"{name:<24}{histogram.count:>8}{percentiles}")
+
+    def reset_stats(self):
+        """Clear every recorded latency."""
+        METRICS.reset()
+        cprint("stats reset.", "green")
+
+    def export_stats(self, path: str):
+        """Write the metrics to `path` in Prometheus text format, replacing it atomically."""
+        try:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+                file.write(self.prometheus_metrics())
+            os.replace(f"{path}.tmp", path)
+        except OSError as error:
+            print_error(f"couldn't write metrics to {path}: {error.strerror.lower()}.")
+            return
+        cprint(f"metrics written to {path}", "green")
+
+    def serve_metrics(self, host: str, port: int):
+        """Serve the metrics over HTTP for Prometheus to scrape, from a background thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        application = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = application.prometheus_metrics().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+class OrderServer:
+    """Serve the command grammar over TCP, one session per connection, all sharing one order store.
+
+    The protocol is line based. The client sends a command per line; the server replies with
+    the command's output, then `= ok` or `= error <count>`. A prompt is sent as `? <message>`
+    and the client's next line is taken as the answer. `= ready` greets each new connection.
+    """
+    # seconds a prompt waits for its answer before the session is closed, freeing its worker
+    PROMPT_TIMEOUT = 120.0
+
+    def __init__(self, order_manager: OrderManager, max_sessions: int = 64, prompt_timeout: float | None = PROMPT_TIMEOUT):
+        self.order_manager = order_manager
+        self.prompt_timeout = prompt_timeout
+        # sessions run side by side on worker threads; the order store does its own locking
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="session")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Run one client's session until it disconnects or quits."""
+        loop = asyncio.get_running_loop()
+        session = NetworkSession(loop, reader, writer, self.prompt_timeout)
+        application = Application(order_manager=self.order_manager.session_view())
+
+        try:
+            writer.write(b"= ready\n")
+            while line := await reader.readline():
+                command = line.decode("utf-8").strip()
+                if not command:
+                    continue
+
+                quitting = await loop.run_in_executor(self.executor, self._execute, application.parser, session, command)
+                writer.write(f"= error {session.errors}\n".encode() if session.errors else b"= ok\n")
+                await writer.drain()
+                if quitting:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _execute(self, parser: CommandParser, session: NetworkSession, command: str) -> bool:
+        """Run a command for a session on a worker thread; return True if the session should end."""
+        token = current_session.set(session)
+        session.errors = 0
+        try:
+            parser.parse_and_execute(command)
+        except (SystemExit, EOFError):
+            return True
+        finally:
+            current_session.reset(token)
+        return False
+
+    async def serve(self, host: str, port: int, ready: Callable[[int], object] | None = None):
+        """Accept connections on host:port until cancelled, passing the bound port to `ready` if given (else announcing it)."""
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        else:
+            address = ", ".join(str(socket.getsockname()) for socket in server.sockets)
+            cprint(f"serving papa-pizza on {address}", "green")
+
+        with contextlib.redirect_stdout(SessionStdout(sys.stdout)):
+            async with server:
+                await server.serve_forever()
+
+class ShardRouter:
+    """Serve the OrderServer protocol from several shard processes, each an OrderServer with its own OrderManager.
+
+    Orders are partitioned by uuid: a shard only makes uuids it owns (see `OrderIds.shard_of`).
+    Each client is given a home shard in turn, and the router holds one connection per shard it
+    has talked to on the client's behalf, so each shard keeps that client's current order.
+    Commands run on the shard holding the client's current order, or on the owning shard of a
+    uuid they name -- `order switch UUID` moves the client there; order numbers start again on
+    each shard, so switching by number is refused. Commands over every order run on every shard,
+    shard by shard; the daily summary is merged from each shard's totals, and the kitchen
+    commands treat the shards' queues as one. Exports write a file per shard, imports all run on
+    the first shard so each external id is only ever checked in one place, and snapshots aren't
+    supported (journals are kept instead).
+    """
+    # commands run on each shard in turn, with the output of each under a heading
+    BROADCAST = ("order list", "order latest", "order between", "order sales", "order process all", "stats", "menu reload")
+    # broadcast commands writing to a file, which each shard writes to FILE.shardK instead
+    PER_SHARD_FILE = ("order sales export", "stats export")
+
+    def __init__(self, shards: int, options: dict):
+        self.shards = shards
+        self.options = options
+        self.addresses: list[tuple[str, int]] = []
+        self.processes = []
+        self._homes = itertools.count()
+
+    def start(self):
+        """Start a process per shard and wait until each is listening."""
+        import multiprocessing
+
+        context = multiprocessing.get_context("spawn")
+        pipes = []
+        for index in range(self.shards):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=run_shard, args=(index, self.shards, self.options, sender), name=f"papa-pizza-shard-{index}", daemon=True)
+            process.start()
+            self.processes.append(process)
+            pipes.append(receiver)
+        self.addresses = [("127.0.0.1", receiver.recv()) for receiver in pipes]
+
+    def stop(self):
+        """Stop every shard process and wait for it to exit."""
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        self.processes.clear()
+
+    async def serve(self, host: str, port: int):
+        """Start the shards, then accept connections on host:port until cancelled, stopping the shards however it ends."""
+        try:
+            self.start()
+            server = await asyncio.start_server(self.handle, host, port)
+            address = ", ".join(str(socket.getsockname()) for socket in server.sockets)
+            cprint(f"serving papa-pizza on {address} across {self.shards} shard(s)", "green")
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.stop()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Route one client's commands until it disconnects or quits."""
+        current = next(self._homes) % self.shards
+        connections: dict[int, tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+
+        try:
+            writer.write(b"= ready\n")
+            while line := await reader.readline():
+                command = line.decode("utf-8").strip()
+                if not command:
+                    continue
+                words = command.split()
+
+                if words[0] == "quit":
+                    if await self._quit(reader, writer):
+                        break
+                    continue
+
+                try:
+                    if words[:2] == ["order", "summary"] and len(words) - (words[2:3] == ["json"]) <= 3:
+                        errors = await self._summary(writer, connections, words[2:])
+                    elif words[:2] == ["order", "switch"] and len(words) == 3 and words[2].isdigit():
+                        writer.write(b"order numbers start from 1 again on each shard; switch by uuid instead.\n")
+                        errors = 1
+                    elif words[0] == "kitchen":
+                        errors = await self._kitchen(reader, writer, connections, current, words)
+                    elif words[0] == "snapshot":
+                        writer.write(b"snapshots aren't supported across shards; each shard keeps its own journal with --journal instead.\n")
+                        errors = 1
+                    elif any(command.startswith(name + " ") for name in self.PER_SHARD_FILE):
+                        name, path = command.rsplit(" ", 1)
+                        errors = 0
+                        for shard in range(self.shards):
+                            writer.write(f"shard {shard}:\n".encode())
+                            errors += await self._relay(reader, writer, connections, shard, f"{name} {path}.shard{shard}")
+                    elif words[:2] == ["order", "import"]:
+                        # one shard holds every imported order, so it alone tells which were imported before
+                        errors = await self._relay(reader, writer, connections, 0, command)
+                    elif any(command == name or command.startswith(name + " ") for name in self.BROADCAST):
+                        errors = await self._broadcast(reader, writer, connections, command)
+                    else:
+                        shard = next((self._owner(word) for word in words if len(word) == 36 and self._owner(word) is not None), current)
+                        errors = await self._relay(reader, writer, connections, shard, command)
+                        if words[:2] == ["order", "switch"] and not errors:
+                            current = shard
+                except OSError as error:
+                    # a shard went away: say so, and reconnect (or fail again) on the next command
+                    writer.write(f"a shard is unavailable: {str(error).lower() or 'connection lost'}\n".encode())
+                    for _, shard_writer in connections.values():
+                        shard_writer.close()
+                    connections.clear()
+                    errors = 1
+
+                writer.write(f"= error {errors}\n".encode() if errors else b"= ok\n")
+                await writer.drain()
+        except (ConnectionError, EOFError):
+            pass
+        finally:
+            for _, shard_writer in connections.values():
+                shard_writer.close()
+            writer.close()
+
+    def _owner(self, word: str) -> int | None:
+        try:
+            return OrderIds.shard_of(uuid.UUID(word), self.shards)
+        except ValueError:
+            return None
+
+    async def _connection(self, connections: dict, shard: int) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if shard not in connections:
+            shard_reader, shard_writer = await asyncio.open_connection(*self.addresses[shard])
+            # = ready
+            await shard_reader.readline()
+            connections[shard] = shard_reader, shard_writer
+        return connections[shard]
+
+    async def _relay(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, connections: dict, shard: int, command: str) -> int:
+        """Run a command on a shard, passing its output and prompts through to the client; return its error count."""
+        shard_reader, shard_writer = await self._connection(connections, shard)
+        shard_writer.write(f"{command}\n".encode("utf-8"))
+        while line := await shard_reader.readline():
+            if line.startswith(b"= "):
+                status = line.split()
+                return int(status[2]) if status[1] == b"error" else 0
+            writer.write(line)
+            if line.startswith(b"? "):
+                await writer.drain()
+                answer = await reader.readline()
+                if not answer:
+                    raise EOFError
+                shard_writer.write(answer)
+        raise ConnectionResetError(f"shard {shard} closed the connection")
+
+    async def _broadcast(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, connections: dict, command: str) -> int:
+        """Run a command on each shard in turn, under a heading per shard; return the total error count."""
+        errors = 0
+        for shard in range(self.shards):
+            writer.write(f"shard {shard}:\n".encode())
+            errors += await self._relay(reader, writer, connections, shard, command)
+        return errors
+
+    async def _collect(self, connections: dict, shard: int, command: str) -> tuple[list[bytes], int]:
+        """Run a command that doesn't prompt on a shard, returning its output lines and error count."""
+        shard_reader, shard_writer = await self._connection(connections, shard)
+        shard_writer.write(f"{command}\n".encode("utf-8"))
+        output = []
+        while line := await shard_reader.readline():
+            if line.startswith(b"= "):
+                status = line.split()
+                return output, int(status[2]) if status[1] == b"error" else 0
+            output.append(line)
+        raise ConnectionResetError(f"shard {shard} closed the connection")
+
+    async def _summary(self, writer: asyncio.StreamWriter, connections: dict, arguments: list[str]) -> int:
+        """Gather every shard's sales totals at once and print them merged, like 'order summary [json]'; return the error count."""
+        as_json = arguments[:1] == ["json"]
+        window = arguments[as_json:]
+        command = " ".join(["order", "summary", "json", *window])
+        results = await asyncio.gather(*(self._collect(connections, shard, command) for shard in range(self.shards)))
+        for output, errors in results:
+            if errors:
+                # the window was invalid; every shard says the same, so pass on the first's reply
+                writer.writelines(output)
+                return errors
+
+        summary = None
+        for output, _ in results:
+            partial = SalesSummary.from_dict(json.loads(output[-1]))
+            summary = partial if summary is None else summary.merge(partial)
+        if as_json:
+            writer.write(f"{json.dumps(summary.as_dict())}\n".encode("utf-8"))
+            return 0
+        if not summary.count and not window:
+            writer.write(b"no sales to summarise :(\n")
+            return 0
+
+        text = io.StringIO()
+        print_sales_summary(summary, f"the last {window[0]}" if window else "today", text)
+        writer.write(text.getvalue().encode("utf-8"))
+        return 0
+
+    async def _kitchen(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, connections: dict, current: int, words: list[str]) -> int:
+        """Run a kitchen command over every shard's queue as if they were one; return its error count.
+
+        `kitchen` shows each shard's queue in turn. `kitchen next` starts the most urgent waiting
+        order of all, and `kitchen done [ORDER]` finishes the one started longest ago (or the
+        one named), each on the shard whose queue holds it.
+        """
+        if len(words) == 1:
+            return await self._broadcast(reader, writer, connections, "kitchen")
+        if not (words[1] in ("next", "json") and len(words) == 2 or words[1] == "done" and len(words) <= 3):
+            # not a kitchen command; let a shard say so
+            return await self._relay(reader, writer, connections, current, " ".join(words))
+
+        results = await asyncio.gather(*(self._collect(connections, shard, "kitchen json") for shard in range(self.shards)))
+        in_progress, waiting = [], []
+        for shard, (output, _) in enumerate(results):
+            tickets = json.loads(output[-1])
+            in_progress += [(ticket, shard) for ticket in tickets["in_progress"]]
+            waiting += [(ticket, shard) for ticket in tickets["waiting"]]
+        # in the order a single queue would keep them (the sorts are stable, so each shard's ties keep theirs)
+        in_progress.sort(key=lambda entry: entry[0]["started_at"])
+        waiting.sort(key=lambda entry: (entry[0]["ready_by"], KitchenQueue.RANK[ServiceType[entry[0]["service_type"]]], entry[0]["paid_at"]))
+
+        if words[1] == "json":
+            merged = {"in_progress": [ticket for ticket, _ in in_progress], "waiting": [ticket for ticket, _ in waiting]}
+            writer.write(f"{json.dumps(merged)}\n".encode("utf-8"))
+            return 0
+        if words[1] == "next":
+            if not waiting:
+                writer.write(b"no orders waiting for the kitchen.\n")
+                return 0
+            return await self._relay(reader, writer, connections, waiting[0][1], "kitchen next")
+
+        if len(words) == 2:
+            if not in_progress:
+                writer.write(b"no orders in progress.\n")
+                return 0
+            ticket, shard = in_progress[0]
+        else:
+            matches = [(ticket, shard) for ticket, shard in in_progress if ticket["order_uuid"].startswith(words[2].lower())]
+            if len(matches) != 1:
+                writer.write((f"no order in progress matches '{words[2]}'.\n" if not matches
+                              else f"'{words[2]}' matches {len(matches)} orders in progress; give more of it.\n").encode("utf-8"))
+                return 1
+            ticket, shard = matches[0]
+        return await self._relay(reader, writer, connections, shard, f"kitchen done {ticket['order_uuid']}")
+
+    @staticmethod
+    async def _quit(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Ask the client to confirm quitting, as 'quit' does; return True if it should be disconnected."""
+        writer.write(b"? are you sure you want to quit? (y/N):\n")
+        await writer.drain()
+        answer = (await reader.readline()).decode("utf-8").strip()
+        if parse_boolean_input(answer):
+            writer.write(b"okay, see ya!\n= ok\n")
+            await writer.drain()
+            return True
+        writer.write(b"= ok\n")
+        return False
+
+def run_shard(index: int, shards: int, options: dict, ready):
+    """Run one shard of a sharded server: an OrderServer over its own OrderManager, on a free local port sent through `ready`."""
+    ORDER_IDS.shard, ORDER_IDS.shards = index, shards
+    journal = options.get("journal")
+    application = Application(f"{journal}.shard{index}" if journal else None, menu_path=options.get("menu"))
+    manager = application.order_manager
+    manager.kitchen.capacity = options["kitchen_capacity"]
+    manager.orders.hot_limit = options["hot_orders"]
+    METRICS.enabled = options["metrics"]
+    try:
+        asyncio.run(OrderServer(manager).serve("127.0.0.1", 0, ready=ready.send))
+    finally:
+        if manager.journal is not None:
+            manager.journal.close()
+
+def run_report(paths: list[str], workers: int | None = None, output: str = "text") -> int:
+    """Aggregate sales exports across a pool of processes and print the report; return an exit code.
+
+    Each file is read and aggregated in a worker, and only the small per-file aggregates come
+    back to be merged, so throughput grows with cores while memory stays flat.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    report = SalesReport()
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(SalesReport.from_file, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                report.merge(future.result())
+            except OSError as error:
+                failures += 1
+                print_error(f"couldn't read {futures[future]}: {(error.strerror or str(error)).lower()}.")
+            except ValueError as error:
+                # a file that isn't text at all fails to decode, rather than just having bad lines
+                failures += 1
+                reason = "it isn't utf-8 text" if isinstance(error, UnicodeDecodeError) else str(error).lower()
+                print_error(f"couldn't read {futures[future]}: {reason}.")
+
+    if output == "json":
+        print(json.dumps(report.as_dict()))
+    elif output == "text":
+        print_sales_report(report)
+    return 1 if failures else 0
+
+def print_sales_summary(summary: SalesSummary, period: str, stream: TextIO | None = None):
+    """Print a sales summary for `period` (e.g. 'today') to `stream`, or stdout."""
+    with Renderer(stream) as renderer:
+        renderer.line(f"sales for {period}:", "green", attrs=["bold"])
+        renderer.line("\t" + f"orders: {summary.count}")
+        for service_type, (count, total) in summary.by_service_type.items():
+            renderer.line("\t" + f"{service_type.name.lower()}: {count} ({format_cents(total)})")
+        renderer.line("\t" + f"discounted: {summary.discounted_count} ({format_cents(summary.discounted_total)})")
+        renderer.line("\t" + f"full price: {summary.full_price_count} ({format_cents(summary.full_price_total)})")
+        renderer.line("\t" + f"loyalty customers: {summary.loyalty_count}")
+        renderer.line("\t" + f"average ticket: {format_cents(summary.average_ticket)}")
+
+        renderer.line(f"total sales for {period}: {format_cents(summary.total)}", "green")
+        renderer.line("thank you for using papa-pizza!", "green")
+
+def print_sales_report(report: SalesReport):
+    """Print a merged sales report, including a bar chart of sales by hour."""
+    with Renderer() as renderer:
+        if report.first is None:
+            renderer.line(f"no sales in {report.files} file(s).", "yellow")
+            return
+
+        period = f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(report.first))} to {time.strftime('%Y-%m-%d %H:%M', time.localtime(report.last))}"
+        renderer.line(f"sales across {report.files} file(s), {period}:", "green", attrs=["bold"])
+        renderer.line("\t" + f"orders: {report.count}")
+        for name, (count, total) in report.by_service_type.items():
+            renderer.line("\t" + f"{name.lower()}: {count} ({format_cents(total)})")
+        share = report.discounted_total / report.total if report.total else 0.0
+        renderer.line("\t" + f"discounted: {report.discounted_count} ({format_cents(report.discounted_total)}, {share:.1%} of sales)")
+        renderer.line("\t" + f"loyalty customers: {report.loyalty_count}")
+        renderer.line("\t" + f"average ticket: {format_cents((2 * report.total + report.count) // (2 * report.count))}")
+        if report.skipped:
+            renderer.line("\t" + f"unreadable lines skipped: {report.skipped}", "yellow")
+
+        renderer.line("by hour:", None, attrs=["bold"])
+        busiest = max(report.hourly_total) or 1
+        for hour in range(24):
+            if report.hourly_count[hour]:
+                bar = "#" * max(1, round(40 * report.hourly_total[hour] / busiest))
+                renderer.line(f"\t{hour:02d}:00 {format_cents(report.hourly_total[hour]):>14} {report.hourly_count[hour]:>7}  {bar}")
+
+        renderer.line(f"total sales: {format_cents(report.total)}", "green")
+
 # Main function to run the program
 def main():
-    """Entry point: instantiate Application with optional CLI args."""
-    args = sys.argv[1:]
-    Application(*args)
+    """Entry point: run a script if given, otherwise start the REPL with optional CLI args."""
+    arg_parser = argparse.ArgumentParser(prog="papa-pizza", description="your local pizza store's ordering backend!")
+    arg_parser.add_argument("-s", "--script", metavar="FILE", help="replay commands from FILE ('-' for stdin) instead of starting the REPL")
+    answers = arg_parser.add_mutually_exclusive_group()
+    answers.add_argument("-y", "--yes", action="store_const", const="y", dest="default_answer", help="answer 'y' to script prompts without a '?' answer")
+    answers.add_argument("-n", "--no", action="store_const", const="n", dest="default_answer", help="answer 'n' to script prompts without a '?' answer")
+    arg_parser.add_argument("-o", "--output", choices=["text", "json", "quiet"], default="text", help="script output format (default: text)")
+    state = arg_parser.add_mutually_exclusive_group()
+    state.add_argument("-j", "--journal", metavar="FILE", help="restore from and record every order event to FILE")
+    state.add_argument("--snapshot", metavar="FILE", help="start from a snapshot saved by the 'snapshot' command")
+    arg_parser.add_argument("-m", "--menu", metavar="FILE", help="load the menu from a JSON file, reloading it whenever it changes")
+    arg_parser.add_argument("--kitchen-capacity", type=int, metavar="N", help="paid orders that can wait for the kitchen before payments are turned away (default: no limit)")
+    arg_parser.add_argument("--hot-orders", type=int, default=10_000, metavar="N", help="orders to hold in full before archiving the longest-paid to a compact cold tier (default: 10000)")
+    arg_parser.add_argument("--serve", metavar="[HOST:]PORT", help="serve many concurrent sessions over TCP instead of starting the REPL")
+    arg_parser.add_argument("--shards", type=int, metavar="N", help="with --serve, partition orders across N processes behind a router (a journal is kept per shard)")
+    arg_parser.add_argument("--metrics", action="store_true", help="record per-command latencies (see the 'stats' command)")
+    arg_parser.add_argument("--metrics-listen", metavar="[HOST:]PORT", help="serve metrics over HTTP in Prometheus text format (implies --metrics)")
+    arg_parser.add_argument("--report", metavar="FILE", nargs="+", help="aggregate sales files written by 'order sales export', then exit")
+    arg_parser.add_argument("--workers", type=int, help="processes to read --report files with (default: one per core)")
+    arg_parser.add_argument("command", nargs=argparse.REMAINDER, help="a command to run before starting the REPL")
+    args = arg_parser.parse_args()
+
+    if args.report is not None:
+        sys.exit(run_report(args.report, args.workers, args.output))
+
+    if args.shards is not None:
+        if args.serve is None or args.shards < 1:
+            arg_parser.error("--shards needs --serve and at least one shard")
+        if args.snapshot is not None or args.metrics_listen is not None:
+            arg_parser.error("--shards can't be combined with --snapshot or --metrics-listen")
+        options = {
+            "journal": args.journal,
+            "menu": args.menu,
+            "kitchen_capacity": args.kitchen_capacity,
+            "hot_orders": args.hot_orders,
+            "metrics": args.metrics,
+        }
+        host, _, port = args.serve.rpartition(":")
+        asyncio.run(ShardRouter(args.shards, options).serve(host or "127.0.0.1", int(port)))
+        return
+
+    try:
+        application = Application(args.journal, menu_path=args.menu, snapshot_path=args.snapshot)
+        application.order_manager.kitchen.capacity = args.kitchen_capacity
+        application.order_manager.orders.hot_limit = args.hot_orders
+    except (OSError, ValueError, struct.error) as error:
+        if args.snapshot is None:
+            raise
+        print_error(f"couldn't load the snapshot {args.snapshot}: {(getattr(error, 'strerror', None) or str(error)).lower()}.")
+        sys.exit(1)
+    METRICS.enabled = args.metrics or args.metrics_listen is not None
+    if args.metrics_listen is not None:
+        host, _, port = args.metrics_listen.rpartition(":")
+        application.serve_metrics(host or "127.0.0.1", int(port))
+
+    try:
+        if args.serve is not None:
+            host, _, port = args.serve.rpartition(":")
+            asyncio.run(OrderServer(application.order_manager).serve(host or "127.0.0.1", int(port)))
+
+        if args.script is not None:
+            with contextlib.nullcontext(sys.stdin) if args.script == "-" else open(args.script, encoding="utf-8") as script:
+                sys.exit(application.run_script(script, args.default_answer, args.output))
+
+        application.start(*args.command)
+    finally:
+        # runs on quit and ctrl+c too, since both exit via SystemExit
+        if application.order_manager.journal is not None:
+            application.order_manager.journal.close()
 
 class SignalHandler:
-    """Handle system SIGINT (Ctrl+C) to remind user to use 'quit'."""
+    """Handle system SIGINT (Ctrl+C) to remind user to use 'quit', and SIGTERM to shut down cleanly."""
     # signal handler to handle ctrl+c
     @staticmethod
     def sigint(_, __):
@@ -545,8 +3797,14 @@ class SignalHandler:
         cprint("\n" + "next time, use quit!", "yellow")
         sys.exit(0)
 
-# register signal handler for (ctrl+c) SIGINT
+    @staticmethod
+    def sigterm(_, __):
+        """Exit on SIGTERM via SystemExit, so journals are closed and shard processes stopped on the way out."""
+        sys.exit(0)
+
+# register signal handlers for (ctrl+c) SIGINT and SIGTERM
 signal.signal(signal.SIGINT, SignalHandler.sigint)
+signal.signal(signal.SIGTERM, SignalHandler.sigterm)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import OrderManager, ScriptSession, ServiceType, current_session, menu
+
+class SharedManagerTest(unittest.TestCase):
+    """A small version of benchmarks/stress_concurrency.py: sessions on threads sharing one OrderManager lose nothing."""
+    threads = 8
+    orders = 4
+    rounds = 300
+
+    def setUp(self):
+        # force frequent thread switches so races actually get a chance to happen
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+    @staticmethod
+    def worker(manager: OrderManager, orders: list, rounds: int, seed: int) -> dict:
+        """Add and remove items at random, then race to pay every order; return the net units this thread changed."""
+        view = manager.session_view()
+        token = current_session.set(ScriptSession(default_answer="y"))
+        rng = random.Random(seed)
+        net: dict[tuple, int] = {}
+        try:
+            for _ in range(rounds):
+                order, item, quantity = rng.choice(orders), rng.choice(menu), rng.randint(1, 3)
+                view.current_order_uuid = order.uuid
+                if rng.random() < 0.7:
+                    change = quantity if view._add_order_item(item, quantity) else 0
+                else:
+                    change = -view._remove_order_item(item, quantity)
+                net[order.uuid, item] = net.get((order.uuid, item), 0) + change
+
+            for order in orders:
+                view.current_order_uuid = order.uuid
+                view.process_order()
+        finally:
+            current_session.reset(token)
+        return net
+
+    def test_no_lost_updates(self):
+        manager = OrderManager()
+        with contextlib.redirect_stdout(io.StringIO()):
+            orders = [manager._create_order([], random.choice(list(ServiceType)), False) for _ in range(self.orders)]
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                results = list(pool.map(lambda seed: self.worker(manager, orders, self.rounds, seed), range(self.threads)))
+
+        expected: dict[tuple, int] = {}
+        for net in results:
+            for key, change in net.items():
+                expected[key] = expected.get(key, 0) + change
+
+        for order in orders:
+            for item in menu:
+                have = order.items[item].quantity if item in order.items else 0
+                self.assertEqual(have, expected.get((order.uuid, item), 0), f"{item.name} in order {order.uuid}")
+            # paid once: one sale at its final total, and one place in the kitchen
+            self.assertTrue(order.paid)
+            self.assertEqual(manager.daily_sales[order.uuid], order.total_cents)
+        self.assertEqual(len(manager.daily_sales), len(orders))
+        self.assertEqual(len(manager.kitchen), len(orders))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import Application, ServiceType, menu
+
+class JournalRestartTest(unittest.TestCase):
+    """Restart from a journal the way --journal does, after a clean exit or a crash."""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "orders.journal")
+
+    def restart(self) -> Application:
+        application = Application(self.path)
+        self.addCleanup(application.order_manager.journal.close)
+        return application
+
+    @staticmethod
+    def sell(application: Application):
+        """Create, fill and pay one pickup order."""
+        manager = application.order_manager
+        with contextlib.redirect_stdout(io.StringIO()):
+            order = manager._create_order([menu[0]], ServiceType.PICKUP, False)
+            manager._pay_order(order)
+        return order
+
+    def test_torn_tail_is_dropped_before_appending(self):
+        application = self.restart()
+        first = self.sell(application)
+        application.order_manager.journal.close()
+        # a crash part way through writing the next record
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(f"pay\t{first.uuid}\t65")
+
+        application = self.restart()
+        self.assertEqual(len(application.order_manager.daily_sales), 1)
+        second = self.sell(application)
+        application.order_manager.journal.close()
+
+        application = self.restart()
+        manager = application.order_manager
+        self.assertEqual(application.skipped_events, 0)
+        self.assertEqual(list(manager.daily_sales.items()), [(first.uuid, first.total_cents), (second.uuid, second.total_cents)])
+        self.assertTrue(manager.orders.get(second.uuid).paid)
+
+    def test_malformed_records_are_skipped_and_counted(self):
+        application = self.restart()
+        order = self.sell(application)
+        application.order_manager.journal.close()
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(f"pay\t{order.uuid}\tnot-cents\t1.0\n")
+            file.write("create\tnot-a-uuid\tPICKUP\t0\n")
+            file.write("add\n")
+
+        application = self.restart()
+        self.assertEqual(application.skipped_events, 3)
+        self.assertEqual(list(application.order_manager.daily_sales.items()), [(order.uuid, order.total_cents)])
+
+if __name__ == "__main__":
+    unittest.main()
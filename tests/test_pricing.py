@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import PRICING, Order, ServiceType, make_menu_item
+
+def order_of(dollars: float, service_type: ServiceType = ServiceType.PICKUP, loyalty: bool = False) -> Order:
+    """Return an order of one item priced at `dollars`."""
+    return Order([make_menu_item("Test Pizza", dollars)], service_type, loyalty)
+
+class PricingTest(unittest.TestCase):
+    """Pin the cents charged by PRICING: 5% off over $100 or with a loyalty card, $8 delivery, then 10% GST."""
+    def assertQuote(self, order: Order, total_cents: int, adjustments: dict[str, int]):
+        quote = order.quote
+        self.assertEqual({rule.label: delta for rule, delta in quote.adjustments}, adjustments)
+        self.assertEqual(quote.total_cents, total_cents)
+        self.assertEqual(quote.subtotal_cents + sum(adjustments.values()), total_cents)
+
+    def test_no_discount_at_exactly_100_dollars(self):
+        self.assertQuote(order_of(100.00), 110_00, {"10% GST": 10_00})
+        self.assertFalse(order_of(100.00).is_discounted)
+
+    def test_discount_just_over_100_dollars(self):
+        # 5% of $100.01 is 500.05c, so $5.00 off; 10% of $95.01 is 950.1c
+        self.assertQuote(order_of(100.01), 104_51, {"5% discount": -5_00, "10% GST": 9_50})
+        self.assertTrue(order_of(100.01).is_discounted)
+
+    def test_loyalty_discount(self):
+        self.assertQuote(order_of(20.00, loyalty=True), 20_90, {"5% discount": -1_00, "10% GST": 1_90})
+
+    def test_delivery_fee(self):
+        self.assertQuote(order_of(20.00, ServiceType.DELIVERY), 30_80, {"delivery": 8_00, "10% GST": 2_80})
+
+    def test_discount_comes_before_the_delivery_fee(self):
+        # the fee isn't discounted, but GST is charged on it
+        self.assertQuote(order_of(100.01, ServiceType.DELIVERY, loyalty=True), 113_31,
+                         {"5% discount": -5_00, "delivery": 8_00, "10% GST": 10_30})
+
+    def test_half_cents_round_away_from_zero(self):
+        # 10% of 5c is half a cent, charged as a whole one
+        self.assertQuote(order_of(0.05), 6, {"10% GST": 1})
+        # 5% of 10c is half a cent off, taken as a whole one; 10% of 9c rounds up too
+        self.assertQuote(order_of(0.10, loyalty=True), 10, {"5% discount": -1, "10% GST": 1})
+
+    def test_total_batch_matches_quote(self):
+        orders = [
+            order_of(dollars, service_type, loyalty)
+            for dollars in (0.05, 0.10, 19.99, 100.00, 100.01, 250.55)
+            for service_type in ServiceType
+            for loyalty in (False, True)
+        ]
+        adjustments = {}
+        totals = PRICING.total_batch(orders, adjustments)
+        self.assertEqual(list(totals), [order.quote.total_cents for order in orders])
+        expected = {}
+        for order in orders:
+            for rule, delta in order.quote.adjustments:
+                expected[rule] = expected.get(rule, 0) + delta
+        self.assertEqual(adjustments, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tests.test_server import ServerTestCase
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main.py")
+
+class ShardRouterTest(unittest.TestCase):
+    """Run `main.py --serve --shards 2` and drive it over sockets; clients are given shards 0 and 1 in turn."""
+    send = staticmethod(ServerTestCase.send)
+
+    def setUp(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.router = subprocess.Popen(
+            [sys.executable, MAIN, "--serve", f"127.0.0.1:{self.port}", "--shards", "2"],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        # SIGTERM, so the router stops its shards on the way out
+        self.addCleanup(self.router.wait)
+        self.addCleanup(self.router.terminate)
+        # serving papa-pizza on ... across 2 shard(s)
+        self.assertIn("across 2 shard(s)", self.router.stdout.readline())
+        self.connections = []
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.close()
+        self.router.stdout.close()
+
+    def connect(self):
+        connection = socket.create_connection(("127.0.0.1", self.port), timeout=10)
+        self.connections.append(connection)
+        stream = connection.makefile("rw", encoding="utf-8", newline="\n")
+        self.assertEqual(stream.readline(), "= ready\n")
+        return stream
+
+    def sell(self, stream, service: str) -> str:
+        """Create, fill and pay an order on the stream's shard; return its uuid."""
+        created = self.send(stream, f"order create {service}", ("n",))
+        order_uuid = next(line.split()[1] for line in created if line.startswith("order ") and "created" in line)
+        self.send(stream, "order item add pepperoni 1")
+        self.assertEqual(self.send(stream, "order process", ("y",))[-1], "= ok")
+        return order_uuid
+
+    def test_kitchen_queues_act_as_one(self):
+        first, second = self.connect(), self.connect()
+        pickup = self.sell(first, "pickup")
+        # paid later, but promised sooner
+        delivery = self.sell(second, "delivery")
+
+        self.assertIn(f"start delivery order {delivery}", "\n".join(self.send(first, "kitchen next")))
+        self.assertIn(f"start pickup order {pickup}", "\n".join(self.send(first, "kitchen next")))
+        self.assertEqual(self.send(first, "kitchen next")[0], "no orders waiting for the kitchen.")
+        # started longest ago
+        self.assertIn(f"order {delivery} is ready", "\n".join(self.send(first, "kitchen done")))
+        self.assertIn(f"order {pickup} is ready", "\n".join(self.send(second, f"kitchen done {pickup[:8]}")))
+
+        kitchen = self.send(first, "kitchen")
+        self.assertEqual([line for line in kitchen if line.startswith("shard ")], ["shard 0:", "shard 1:"])
+
+    def test_summary_json_is_merged(self):
+        first, second = self.connect(), self.connect()
+        self.sell(first, "pickup")
+        self.sell(second, "delivery")
+        output = self.send(first, "order summary json")
+        self.assertEqual(output[-1], "= ok")
+        self.assertEqual(json.loads(output[0])["count"], 2)
+        self.assertEqual(self.send(first, "order summary json 1h")[-1], "= ok")
+
+    def test_switching_by_number_is_refused(self):
+        stream = self.connect()
+        self.sell(stream, "pickup")
+        self.assertEqual(self.send(stream, "order switch 1")[-1], "= error 1")
+
+    @unittest.skipUnless(sys.platform == "linux", "finds the shard processes through /proc")
+    def test_sigterm_stops_the_shards(self):
+        with open(f"/proc/{self.router.pid}/task/{self.router.pid}/children") as file:
+            shards = [int(pid) for pid in file.read().split()]
+        self.assertTrue(shards)
+        self.router.terminate()
+        self.router.wait(timeout=10)
+
+        deadline = time.monotonic() + 10
+        while shards and time.monotonic() < deadline:
+            shards = [pid for pid in shards if os.path.exists(f"/proc/{pid}") and not self.zombie(pid)]
+            time.sleep(0.05)
+        self.assertEqual(shards, [])
+
+    @staticmethod
+    def zombie(pid: int) -> bool:
+        try:
+            with open(f"/proc/{pid}/stat") as file:
+                return file.read().rsplit(")", 1)[1].split()[0] == "Z"
+        except FileNotFoundError:
+            return False
+
+if __name__ == "__main__":
+    unittest.main()
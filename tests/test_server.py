@@ -0,0 +1,112 @@
+import asyncio
+import os
+import queue
+import socket
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import OrderManager, OrderServer
+
+class ServerTestCase(unittest.TestCase):
+    """Run an OrderServer on a free local port for each test, in its own event loop thread."""
+    prompt_timeout = 5.0
+
+    def setUp(self):
+        self.manager = OrderManager()
+        ports = queue.Queue()
+        self.loop = asyncio.new_event_loop()
+
+        def run():
+            server = OrderServer(self.manager, max_sessions=4, prompt_timeout=self.prompt_timeout)
+            self.task = self.loop.create_task(server.serve("127.0.0.1", 0, ready=ports.put))
+            try:
+                self.loop.run_until_complete(self.task)
+            except asyncio.CancelledError:
+                pass
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        self.port = ports.get(timeout=5)
+        self.connections = []
+
+    def tearDown(self):
+        # the server waits for its connections to close before it stops
+        for connection in self.connections:
+            connection.close()
+        self.loop.call_soon_threadsafe(self.task.cancel)
+        self.thread.join(timeout=5)
+        self.loop.close()
+
+    def connect(self):
+        connection = socket.create_connection(("127.0.0.1", self.port), timeout=10)
+        self.connections.append(connection)
+        stream = connection.makefile("rw", encoding="utf-8", newline="\n")
+        self.assertEqual(stream.readline(), "= ready\n")
+        return stream
+
+    @staticmethod
+    def send(stream, command: str, answers: tuple[str, ...] = ()) -> list[str]:
+        """Send a command, answering its prompts in turn; return its output up to and including the status line."""
+        answers = list(answers)
+        stream.write(command + "\n")
+        stream.flush()
+        lines = []
+        while True:
+            line = stream.readline()
+            if not line:
+                return lines
+            lines.append(line.rstrip("\n"))
+            if line.startswith("= "):
+                return lines
+            if line.startswith("? "):
+                stream.write(answers.pop(0) + "\n")
+                stream.flush()
+
+class OrderServerTest(ServerTestCase):
+    def test_order_is_created_filled_and_paid(self):
+        stream = self.connect()
+        self.assertEqual(self.send(stream, "order create pickup", ("n",))[-1], "= ok")
+        self.assertEqual(self.send(stream, "order item add pepperoni 2")[-1], "= ok")
+        output = self.send(stream, "order process", ("y",))
+        self.assertEqual(output[-1], "= ok")
+        self.assertTrue(any("paid successfully" in line for line in output))
+        self.assertEqual(len(self.manager.daily_sales), 1)
+
+    def test_errors_are_counted(self):
+        stream = self.connect()
+        self.send(stream, "order create pickup", ("n",))
+        self.assertEqual(self.send(stream, "order switch 7")[-1], "= error 1")
+
+    def test_sessions_have_their_own_current_order(self):
+        first, second = self.connect(), self.connect()
+        self.send(first, "order create pickup", ("n",))
+        self.assertTrue(self.send(second, "order item add pepperoni", ("n",))[-1].startswith("= error"))
+        self.assertEqual(self.send(first, "order item add pepperoni")[-1], "= ok")
+
+    def test_quit_closes_the_connection(self):
+        stream = self.connect()
+        self.assertEqual(self.send(stream, "quit", ("y",))[-1], "= ok")
+        self.assertEqual(stream.readline(), "")
+
+class PromptTimeoutTest(ServerTestCase):
+    prompt_timeout = 0.2
+
+    def test_unanswered_prompt_closes_the_session(self):
+        stream = self.connect()
+        stream.write("order create pickup\n")
+        stream.flush()
+        self.assertTrue(stream.readline().startswith("? "))
+        lines = []
+        while line := stream.readline():
+            lines.append(line.rstrip("\n"))
+        self.assertIn("no answer in time, closing the session.", lines)
+
+        # the worker it held is free for other sessions
+        other = self.connect()
+        self.assertEqual(self.send(other, "order create pickup", ("n",))[-1], "= ok")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import OrderManager, OrderStore, ServiceType, Snapshot, menu
+
+class HotLimitTest(unittest.TestCase):
+    """However orders arrive, no more than `hot_limit` are held in full while paid ones can be archived."""
+    hot_limit = 3
+
+    def setUp(self):
+        # 6 paid orders and 2 unpaid, oldest first
+        self.manager = OrderManager()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.orders = [self.manager._create_order([menu[0]], ServiceType.PICKUP, False) for _ in range(8)]
+            for order in self.orders[:6]:
+                self.manager._pay_order(order)
+
+    def assertWithinLimit(self, store: OrderStore):
+        self.assertEqual([order.uuid for order in store], [order.uuid for order in self.orders])
+        self.assertEqual(store.hot_count, self.hot_limit)
+
+    def test_add(self):
+        store = OrderStore(self.hot_limit)
+        for order in self.orders:
+            store.add(order)
+        self.assertWithinLimit(store)
+
+    def test_extend(self):
+        store = OrderStore(self.hot_limit)
+        store.extend(self.orders)
+        self.assertWithinLimit(store)
+
+    def test_building_snapshot_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "orders.snapshot")
+            Snapshot.save(self.manager, path)
+            manager = OrderManager()
+            Snapshot.load(manager, path)
+            manager.orders.hot_limit = self.hot_limit
+            # builds every record, the unpaid ones last
+            self.assertWithinLimit(manager.orders)
+
+if __name__ == "__main__":
+    unittest.main()